@@ -1,8 +1,9 @@
+from flask import current_app, has_app_context
 from app.extensions import db
 import datetime
 import re
-from werkzeug.security import generate_password_hash, check_password_hash
 from typing import List
+from app.utils.password_hashing import WerkzeugHasher
 
 class User(db.Model):
     """
@@ -10,6 +11,10 @@ class User(db.Model):
     """
     __tablename__ = 'users'
 
+    # Werkzeug hash method used by set_password; verification reads the method
+    # back from the stored hash, so changing this never invalidates old hashes
+    PASSWORD_HASH_METHOD = 'scrypt'
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -36,30 +41,47 @@ class User(db.Model):
     audit_logs = db.relationship('AuditLog', back_populates='user', foreign_keys='AuditLog.user_id')
     created_by_user = db.relationship('User', foreign_keys=[created_by], remote_side=[id])
 
-    def __init__(self, **kwargs):
+    def __init__(self, hasher=None, **kwargs):
         """Initialize a new user with optional password hashing."""
         # Handle password parameter if provided
         if 'password' in kwargs:
             password = kwargs.pop('password')
             super().__init__(**kwargs)
-            self.set_password(password)
+            self.set_password(password, hasher=hasher)
         else:
             super().__init__(**kwargs)
 
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, role_id={self.role_id})>"
 
-    def set_password(self, password):
+    @classmethod
+    def from_precomputed(cls, password_hash, **kwargs):
+        """Create a user from an existing password hash without rehashing."""
+        return cls(password_hash=password_hash, **kwargs)
+
+    def _get_hasher(self, hasher=None):
+        """
+        Return the given hasher, or a Werkzeug one using the app's
+        PASSWORD_HASH_METHOD config (a cost toggle for tests) if set.
+        """
+        if hasher:
+            return hasher
+        method = self.PASSWORD_HASH_METHOD
+        if has_app_context():
+            method = current_app.config.get('PASSWORD_HASH_METHOD', method)
+        return WerkzeugHasher(method)
+
+    def set_password(self, password, hasher=None):
         """Hash and set the user's password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = self._get_hasher(hasher).hash(password)
 
-    def check_password(self, password):
+    def check_password(self, password, hasher=None):
         """Check if the provided password matches the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return self._get_hasher(hasher).verify(self.password_hash, password)
 
-    def verify_password(self, password):
+    def verify_password(self, password, hasher=None):
         """Alias for check_password for compatibility with auth service."""
-        return self.check_password(password)
+        return self.check_password(password, hasher=hasher)
 
     def check_password_policy(self, password):
         """
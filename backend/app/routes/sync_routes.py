@@ -181,9 +181,12 @@ def get_device_roles():
     """Get all device roles."""
     try:
         devices = DeviceRole.query.all()
-        return jsonify({
+        response = jsonify({
             'devices': [device.to_dict() for device in devices]
-        }), 200
+        })
+        # Let pollers use If-None-Match and get a bodyless 304 when nothing changed
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': f'Failed to get device roles: {str(e)}'}), 500
 
@@ -6,7 +6,7 @@ This module provides REST API endpoints for user management,
 including CRUD operations, role assignment, and account management.
 """
 
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from functools import wraps
 from typing import Dict, Any, Optional, Tuple, List
 import logging
@@ -69,6 +69,10 @@ def validate_request_data(required_fields: list) -> Tuple[bool, Optional[Dict[st
 def log_user_operation(operation: str, user_id: int, target_user_id: Optional[int] = None, 
                       details: Optional[Dict] = None, success: bool = True, error_message: Optional[str] = None):
     """Log user management operations for audit trail."""
+    # Audit logging is on unless the app config turns it off (e.g. in tests)
+    if not current_app.config.get('AUDIT_LOGGING', True):
+        return
+    
     try:
         db_session = getattr(g, 'db', None)
         if not db_session:
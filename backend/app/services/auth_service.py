@@ -8,11 +8,14 @@ authentication flow where only the first device requires admin registration.
 
 import jwt
 import bcrypt
+import hashlib
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple, List
 from sqlalchemy.orm import Session
 from app.models import User, AuditLog
 import os
+import threading
+import time
 import uuid
 
 
@@ -24,8 +27,16 @@ class AuthService:
     admin registration, and subsequent devices auto-discover the existing admin.
     """
     
-    def __init__(self, db_session: Session):
+    # Verified token claims keyed by a blake2b digest of the token:
+    # {digest: (claims, exp timestamp)}. Shared because routes build a new
+    # service per request, so every access goes through the lock.
+    _verified_tokens: Dict[bytes, Tuple[Dict[str, Any], float]] = {}
+    _verified_tokens_max = 1024
+    _verified_tokens_lock = threading.Lock()
+    
+    def __init__(self, db_session: Session, hasher=None):
         self.db = db_session
+        self.hasher = hasher  # None uses the User model's default hasher
         self.jwt_secret = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
         self.jwt_algorithm = 'HS256'
         self.token_expiry = 3600  # 1 hour default
@@ -68,7 +79,7 @@ class AuthService:
                 return False, None, "Account is locked due to multiple failed login attempts"
             
             # Verify password
-            if not user.verify_password(password):
+            if not user.verify_password(password, hasher=self.hasher):
                 user.increment_failed_login()
                 self.db.commit()
                 
@@ -156,6 +167,7 @@ class AuthService:
             user.current_session_id = None
             
             self.db.commit()
+            AuthService.evict_cached_tokens(user.id)
             
             # Log logout event
             self._log_auth_event(
@@ -190,8 +202,8 @@ class AuthService:
             Tuple of (valid, user_data, error_message)
         """
         try:
-            # Decode token
-            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+            # Decode token, reusing the claims of a token verified before
+            payload = self._decode_token_cached(token)
             
             # Extract user information
             user_id = payload.get('user_id')
@@ -230,6 +242,67 @@ class AuthService:
         except Exception as e:
             return False, None, f"Token verification error: {str(e)}"
     
+    def _decode_token_cached(self, token: str) -> Dict[str, Any]:
+        """
+        Decode a JWT token, skipping signature verification for tokens
+        already verified and not yet expired.
+        
+        Args:
+            token: JWT token to decode
+            
+        Returns:
+            Token claims
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.jwt_secret.encode('utf-8'))
+        digest.update(b'\x00')
+        digest.update(token.encode('utf-8'))
+        key = digest.digest()
+        
+        with AuthService._verified_tokens_lock:
+            cached = AuthService._verified_tokens.get(key)
+            if cached is not None:
+                if cached[1] > time.time():
+                    return cached[0]
+                AuthService._verified_tokens.pop(key, None)
+        
+        payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+        
+        exp = payload.get('exp')
+        if isinstance(exp, (int, float)):
+            with AuthService._verified_tokens_lock:
+                if len(AuthService._verified_tokens) >= AuthService._verified_tokens_max:
+                    AuthService._prune_cached_tokens()
+                AuthService._verified_tokens[key] = (payload, exp)
+        
+        return payload
+    
+    @classmethod
+    def _prune_cached_tokens(cls) -> None:
+        """
+        Drop expired cached tokens, clearing the cache if it is still full.
+        The caller must hold _verified_tokens_lock.
+        """
+        now = time.time()
+        for key, entry in list(cls._verified_tokens.items()):
+            if entry[1] <= now:
+                del cls._verified_tokens[key]
+        if len(cls._verified_tokens) >= cls._verified_tokens_max:
+            cls._verified_tokens.clear()
+    
+    @classmethod
+    def evict_cached_tokens(cls, user_id: int) -> None:
+        """
+        Drop cached token claims for a user, e.g. after logout.
+        
+        Args:
+            user_id: User whose tokens should be verified again
+        """
+        with cls._verified_tokens_lock:
+            for key, entry in list(cls._verified_tokens.items()):
+                if entry[0].get('user_id') == user_id:
+                    del cls._verified_tokens[key]
+    
     def refresh_token(self, user_id: int, session_id: str) -> Tuple[bool, Optional[str], Optional[str]]:
         """
         Refresh JWT token for a user.
@@ -305,7 +378,7 @@ class AuthService:
                 return False, "User not found"
             
             # Verify current password
-            if not user.verify_password(current_password):
+            if not user.verify_password(current_password, hasher=self.hasher):
                 return False, "Current password is incorrect"
             
             # Check password policy
@@ -314,7 +387,7 @@ class AuthService:
                 return False, message
             
             # Change password
-            user.set_password(new_password)
+            user.set_password(new_password, hasher=self.hasher)
             self.db.commit()
             
             # Log password change
@@ -385,7 +458,8 @@ class AuthService:
                 email=admin_data['email'],
                 password=admin_data['password'],
                 first_name=admin_data['first_name'],
-                last_name=admin_data['last_name']
+                last_name=admin_data['last_name'],
+                hasher=self.hasher
             )
             
             is_valid, message = user.check_password_policy(admin_data['password'])
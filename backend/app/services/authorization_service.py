@@ -6,8 +6,8 @@ This service handles permission checking, role-based access control (RBAC),
 and authorization middleware for protecting API endpoints.
 """
 
-from typing import Optional, List, Dict, Any, Callable
-from sqlalchemy.orm import Session
+from typing import Optional, List, Dict, Any, Callable, Iterable, Set
+from sqlalchemy.orm import Session, selectinload
 from app.models import User, Role, Permission, UserRole, RolePermission
 from functools import wraps
 from flask import request, jsonify, g
@@ -69,6 +69,46 @@ class AuthorizationService:
         except Exception:
             return False
     
+    def batch_check(self, user_id: int, permissions: Iterable[str] = (),
+                    roles: Iterable[str] = ()) -> Dict[str, Set[str]]:
+        """
+        Check several permissions and roles for a user in one pass.
+        
+        The user's roles and their permissions are loaded together up front,
+        so the number of queries does not grow with the names being checked.
+        
+        Args:
+            user_id: User ID to check
+            permissions: Permission names to check (e.g., 'users:create')
+            roles: Role names to check
+            
+        Returns:
+            Dictionary with the granted subsets under 'permissions' and 'roles'
+        """
+        granted = {'permissions': set(), 'roles': set()}
+        try:
+            user = self.db.query(User).options(
+                selectinload(User.roles)
+                .selectinload(UserRole.role)
+                .selectinload(Role.permissions)
+                .selectinload(RolePermission.permission)
+            ).filter(User.id == user_id).first()
+            
+            if not user or not user.is_active:
+                return granted
+            
+            user_permissions = set()
+            for user_role in user.roles:
+                if user_role.is_active and user_role.role.is_active:
+                    user_permissions.update(user_role.role.get_permissions())
+            
+            granted['permissions'] = user_permissions.intersection(permissions)
+            granted['roles'] = set(user.get_roles()).intersection(roles)
+            return granted
+            
+        except Exception:
+            return {'permissions': set(), 'roles': set()}
+    
     def get_user_permissions(self, user_id: int) -> List[str]:
         """
         Get all permissions for a user.
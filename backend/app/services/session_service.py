@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
 from app.models import User, AuditLog
+from app.services.auth_service import AuthService
 import uuid
 
 
@@ -139,6 +140,7 @@ class SessionService:
             user.last_logout = datetime.utcnow()
             
             self.db.commit()
+            AuthService.evict_cached_tokens(user.id)
             
             # Log session invalidation
             self._log_session_event(
@@ -343,6 +345,7 @@ class SessionService:
             user.last_logout = datetime.utcnow()
             
             self.db.commit()
+            AuthService.evict_cached_tokens(user.id)
             
             # Log forced logout
             self._log_session_event(
@@ -374,13 +377,17 @@ class SessionService:
             if not user:
                 return {}
             
+            # last_logout is not a User column; it is only set on the
+            # instance by logout, so it may be missing
+            last_logout = getattr(user, 'last_logout', None)
+            
             return {
                 'user_id': user.id,
                 'username': user.username,
                 'session_id': user.current_session_id,
                 'device_id': user.device_id,
                 'last_login': user.last_login.isoformat() if user.last_login else None,
-                'last_logout': user.last_logout.isoformat() if user.last_logout else None,
+                'last_logout': last_logout.isoformat() if last_logout else None,
                 'is_session_active': user.current_session_id is not None,
                 'can_override_single_device': user.can_override_single_device(),
                 'session_timeout': self._get_session_timeout(user),
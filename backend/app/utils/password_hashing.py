@@ -0,0 +1,20 @@
+"""
+Password hashing strategies for user accounts.
+"""
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class WerkzeugHasher:
+    """Hash and verify passwords with Werkzeug's security helpers."""
+
+    def __init__(self, method: str = 'scrypt'):
+        self.method = method
+
+    def hash(self, password: str) -> str:
+        """Return a salted hash of the password."""
+        return generate_password_hash(password, method=self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash."""
+        return check_password_hash(password_hash, password)
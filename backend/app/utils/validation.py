@@ -1,8 +1,20 @@
 """
 Validation utilities for device registration and sync operations.
 """
+import re
 from typing import Tuple, Dict, Any, Optional
 
+# Valid roles for device registration
+VALID_DEVICE_ROLES = ('admin', 'manager', 'assistant_manager', 'sales_assistant', 'master', 'client')
+
+VALID_SYNC_EVENT_TYPES = (
+    'critical_event', 'data_update', 'sync_request', 'sync_response',
+    'device_online', 'device_offline', 'master_election', 'role_change'
+)
+
+# Characters (and SQL comment markers) not allowed in device IDs, compiled once
+_DANGEROUS_DEVICE_ID_CHARS = re.compile(r"--|/\*|\*/|[<>\"';@#$%^&*()+={}\[\]|\\:,/?]")
+
 
 def validate_device_registration_data(data: Dict[str, Any]) -> Tuple[bool, Optional[str], Dict[str, Any]]:
     """
@@ -41,10 +53,8 @@ def validate_device_registration_data(data: Dict[str, Any]) -> Tuple[bool, Optio
     if not isinstance(role, str):
         return False, "role must be a string", {}
     
-    # Define valid roles for device registration
-    valid_roles = ['admin', 'manager', 'assistant_manager', 'sales_assistant', 'master', 'client']
-    if role not in valid_roles:
-        return False, f"Invalid role. Must be one of: {', '.join(valid_roles)}", {}
+    if role not in VALID_DEVICE_ROLES:
+        return False, f"Invalid role. Must be one of: {', '.join(VALID_DEVICE_ROLES)}", {}
     
     # Validate priority
     if priority is None:
@@ -57,10 +67,8 @@ def validate_device_registration_data(data: Dict[str, Any]) -> Tuple[bool, Optio
         return False, "priority must be between 0 and 100", {}
     
     # Validate device_id doesn't contain dangerous characters
-    dangerous_chars = ['<', '>', '"', "'", ';', '--', '/*', '*/', '@', '#', '$', '%', '^', '&', '*', '(', ')', '+', '=', '{', '}', '[', ']', '|', '\\', ':', ';', '"', "'", ',', '<', '>', '/', '?']
-    for char in dangerous_chars:
-        if char in device_id:
-            return False, "device_id contains invalid characters", {}
+    if _DANGEROUS_DEVICE_ID_CHARS.search(device_id):
+        return False, "device_id contains invalid characters", {}
     
     # Return validated data
     validated_data = {
@@ -96,13 +104,8 @@ def validate_sync_event_data(data: Dict[str, Any]) -> Tuple[bool, Optional[str],
     if not isinstance(event_type, str):
         return False, "event_type must be a string", {}
     
-    valid_event_types = [
-        'critical_event', 'data_update', 'sync_request', 'sync_response',
-        'device_online', 'device_offline', 'master_election', 'role_change'
-    ]
-    
-    if event_type not in valid_event_types:
-        return False, f"Invalid event_type. Must be one of: {', '.join(valid_event_types)}", {}
+    if event_type not in VALID_SYNC_EVENT_TYPES:
+        return False, f"Invalid event_type. Must be one of: {', '.join(VALID_SYNC_EVENT_TYPES)}", {}
     
     # Validate device_id if present
     if device_id:
@@ -1,9 +1,52 @@
-import sys
 import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import hashlib
+import hmac
+import sqlite3
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 from app import create_app
 from app.extensions import db
+from app.models import User, Role
+from tests.db_helpers import apply_test_pragmas
+
+# Password of the testuser seeded by seeded_session
+TEST_PASSWORD = "SecurePass123!"
+
+@pytest.fixture(scope='session', autouse=True)
+def fast_password_hashing():
+    """Hash passwords with a single PBKDF2 iteration; tests only check the roundtrip."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(User, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1')
+        yield
+
+@pytest.fixture(scope='session', autouse=True)
+def test_jwt_secret():
+    """Sign tokens with a fixed HS256 test key regardless of the caller's environment."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('JWT_SECRET_KEY', 'rms-test-suite-jwt-secret-key-32b')
+        yield
+
+# Flask apps built by make_app, keyed by a hashable view of their config
+_apps = {}
+
+def _freeze(config):
+    """Hashable view of a config dict; nested dicts become sorted item tuples."""
+    return tuple(sorted(
+        (key, _freeze(value) if isinstance(value, dict) else value)
+        for key, value in config.items()
+    ))
+
+@pytest.fixture(scope='session')
+def make_app():
+    """Return a create_app wrapper that builds each distinct test config only once."""
+    def make(config):
+        key = _freeze(config)
+        if key not in _apps:
+            _apps[key] = create_app(config)
+        return _apps[key]
+    return make
 
 @pytest.fixture
 def app():
@@ -18,4 +61,66 @@ def app():
 
 @pytest.fixture
 def client(app):
-    return app.test_client() 
\ No newline at end of file
+    return app.test_client()
+
+class FastTestHasher:
+    """Salted single-round SHA-256 hasher for tests that don't exercise the real algorithm."""
+
+    def hash(self, password):
+        salt = os.urandom(8).hex()
+        return f"test-sha256${salt}${hashlib.sha256((salt + password).encode()).hexdigest()}"
+
+    def verify(self, password_hash, password):
+        _, salt, digest = password_hash.split('$')
+        return hmac.compare_digest(digest, hashlib.sha256((salt + password).encode()).hexdigest())
+
+@pytest.fixture(scope='session')
+def fast_hasher():
+    return FastTestHasher()
+
+
+@pytest.fixture(scope='session')
+def template_db():
+    """Create the schema once in an in-memory database that each test clones."""
+    template = sqlite3.connect(':memory:', check_same_thread=False)
+    engine = create_engine('sqlite://', creator=lambda: template, poolclass=StaticPool)
+    # The models are Flask-SQLAlchemy models, so their tables live on db.metadata
+    db.metadata.create_all(engine)
+    yield template
+    engine.dispose()
+
+@pytest.fixture
+def db_session(template_db):
+    """Session on a private copy of the template schema, discarded after the test."""
+    connection = sqlite3.connect(':memory:', check_same_thread=False)
+    # Page-level copy of the template instead of re-running every CREATE TABLE
+    template_db.backup(connection)
+    engine = create_engine('sqlite://', creator=lambda: connection, poolclass=StaticPool)
+    apply_test_pragmas(engine)
+    # Keep loaded attributes across commits so reading .id needs no SELECT
+    session = Session(bind=engine, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture(scope='session')
+def password_hash(fast_hasher):
+    """Hash TEST_PASSWORD once for every user built from it."""
+    return fast_hasher.hash(TEST_PASSWORD)
+
+@pytest.fixture
+def seeded_session(db_session, password_hash):
+    """Yield (db_session, user, admin_role) with the standard testuser and Admin role committed."""
+    user = User.from_precomputed(
+        password_hash,
+        username="testuser",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User"
+    )
+    admin_role = Role(name="Admin", description="Admin role")
+    db_session.add_all([user, admin_role])
+    db_session.commit()
+    yield db_session, user, admin_role
@@ -0,0 +1,39 @@
+"""
+SQLite engine and session helpers shared by the database-backed test modules.
+"""
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session as FlaskSession
+
+
+def apply_test_pragmas(engine):
+    """Skip journaling and syncs; the test databases never outlive the run."""
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.executescript(
+            "PRAGMA synchronous=OFF;"
+            "PRAGMA journal_mode=MEMORY;"
+            "PRAGMA locking_mode=EXCLUSIVE;"
+            "PRAGMA temp_store=MEMORY;"
+        )
+        cursor.close()
+
+
+def enable_sqlite_savepoints(engine):
+    """Let SQLAlchemy own BEGIN so pysqlite does not break SAVEPOINT handling."""
+    @event.listens_for(engine, 'connect')
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _emit_begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+
+class JoinedSession(FlaskSession):
+    """Flask-SQLAlchemy session that always uses its bound test connection."""
+
+    def get_bind(self, *args, **kwargs):
+        # The base class resolves the app engine from the model's bind key,
+        # which would bypass the outer test transaction
+        return self.bind
@@ -9,6 +9,8 @@ import glob
 from datetime import datetime
 from typing import Dict, List, Any
 
+from script_helpers import write_json_atomic
+
 
 def analyze_feedback_files():
     """Analyze all feedback files in the test_results directory."""
@@ -22,66 +24,59 @@ def analyze_feedback_files():
         print("❌ No feedback files found in data/test_results/")
         return
     
-    all_feedback = []
+    # Aggregate in a single pass so only running totals are kept in memory
+    score_types = ('validation_confidence', 'performance_rating', 'overall_satisfaction')
+    roles = {}
+    score_sums = {score_type: 0.0 for score_type in score_types}
+    score_counts = {score_type: 0 for score_type in score_types}
+    common_issues = set()
+    improvement_suggestions = []
+    total_responses = 0
+    
     for filename in feedback_files:
         try:
             with open(filename, 'r') as f:
                 feedback = json.load(f)
-                all_feedback.append(feedback)
         except Exception as e:
             print(f"⚠️  Error reading {filename}: {e}")
+            continue
+        
+        total_responses += 1
+        
+        role = feedback.get('role', 'unknown')
+        roles[role] = roles.get(role, 0) + 1
+        
+        for score_type in score_types:
+            if score_type in feedback:
+                score_sums[score_type] += feedback[score_type]
+                score_counts[score_type] += 1
+        
+        if feedback.get('additional_features'):
+            improvement_suggestions.append(feedback['additional_features'])
+        
+        if feedback.get('error_message_clarity') == 'No':
+            common_issues.add('Error message clarity')
+        if feedback.get('workflow_impact') == 'Negative':
+            common_issues.add('Workflow disruption')
     
-    if not all_feedback:
+    if not total_responses:
         print("❌ No valid feedback data found")
         return
     
-    # Analyze feedback
+    # Build analysis from the accumulated totals
     analysis = {
         'timestamp': datetime.now().isoformat(),
-        'total_responses': len(all_feedback),
-        'roles': {},
-        'average_scores': {},
-        'common_issues': [],
-        'improvement_suggestions': []
-    }
-    
-    # Analyze by role
-    for feedback in all_feedback:
-        role = feedback.get('role', 'unknown')
-        if role not in analysis['roles']:
-            analysis['roles'][role] = 0
-        analysis['roles'][role] += 1
-    
-    # Calculate average scores
-    scores = {
-        'validation_confidence': [],
-        'performance_rating': [],
-        'overall_satisfaction': []
+        'total_responses': total_responses,
+        'roles': roles,
+        'average_scores': {
+            score_type: score_sums[score_type] / score_counts[score_type]
+            for score_type in score_types
+            if score_counts[score_type]
+        },
+        'common_issues': sorted(common_issues),
+        'improvement_suggestions': improvement_suggestions
     }
     
-    for feedback in all_feedback:
-        for score_type in scores:
-            if score_type in feedback:
-                scores[score_type].append(feedback[score_type])
-    
-    for score_type, values in scores.items():
-        if values:
-            analysis['average_scores'][score_type] = sum(values) / len(values)
-    
-    # Collect improvement suggestions
-    for feedback in all_feedback:
-        if 'additional_features' in feedback and feedback['additional_features']:
-            analysis['improvement_suggestions'].append(feedback['additional_features'])
-    
-    # Identify common issues
-    for feedback in all_feedback:
-        if feedback.get('error_message_clarity') == 'No':
-            analysis['common_issues'].append('Error message clarity')
-        if feedback.get('workflow_impact') == 'Negative':
-            analysis['common_issues'].append('Workflow disruption')
-    
-    analysis['common_issues'] = list(set(analysis['common_issues']))
-    
     # Print analysis results
     print(f"📈 Analysis Results:")
     print(f"   Total Responses: {analysis['total_responses']}")
@@ -96,8 +91,7 @@ def analyze_feedback_files():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     analysis_filename = f"data/test_results/feedback_analysis_{timestamp}.json"
     
-    with open(analysis_filename, 'w') as f:
-        json.dump(analysis, f, indent=2)
+    write_json_atomic(analysis_filename, analysis)
     
     print(f"\n💾 Analysis saved to: {analysis_filename}")
     
@@ -4,264 +4,319 @@ Feedback Collection Runner for UAT Step 15.4
 This script helps collect and analyze user feedback for validation improvements.
 """
 
-import json
+import functools
+import statistics
 import sys
 import os
+import time
+import orjson
+from array import array
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple, ClassVar, Set
+
+try:
+    import readline  # noqa: F401 -- imported for its side effect: input() line editing and a shared answer history
+except ImportError:  # readline is not available on Windows
+    pass
 
 # Add the backend directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.utils.validation import validate_device_registration_data, validate_sync_event_data
+from tests.script_helpers import cached_validate
+
+
+# Device registration scenarios exercised by test_validation_scenarios
+_SCENARIOS: Tuple[Dict[str, Any], ...] = (
+    {
+        'name': 'Invalid Device ID',
+        'data': {'device_id': 'test<script>', 'role': 'admin', 'priority': 100},
+        'expected': False
+    },
+    {
+        'name': 'Invalid Role',
+        'data': {'device_id': 'test', 'role': 'invalid_role', 'priority': 100},
+        'expected': False
+    },
+    {
+        'name': 'Invalid Priority',
+        'data': {'device_id': 'test', 'role': 'admin', 'priority': 150},
+        'expected': False
+    },
+    {
+        'name': 'Missing Fields',
+        'data': {'device_id': 'test', 'role': 'admin'},
+        'expected': False
+    },
+    {
+        'name': 'Valid Registration',
+        'data': {'device_id': 'test_device', 'role': 'admin', 'priority': 100},
+        'expected': True
+    }
+)
+
+
+# Accepted Yes/No/Partially answers mapped to their display form
+_YES_NO_ANSWERS = {'yes': 'Yes', 'no': 'No', 'partially': 'Partially'}
+
+
+# A form question: (prompt, answer hint, parser returning None for invalid answers)
+Question = Tuple[str, str, Callable[[str], Any]]
 
 
 class FeedbackCollector:
     """Collect and analyze user feedback for validation improvements."""
     
-    def __init__(self):
-        self.feedback_data = {
-            'timestamp': datetime.now().isoformat(),
-            'validation_feedback': [],
-            'sync_feedback': [],
-            'performance_feedback': [],
-            'overall_satisfaction': {}
-        }
+    # Output directories already created by this process
+    _created_dirs: ClassVar[Set[str]] = set()
+    
+    def __init__(self, filename: str = None):
+        """
+        Args:
+            filename: JSONL file that feedback records are appended to; defaults
+                to a timestamped file under data/test_results/
+        """
+        # One timestamp is shared by every record collected in this session
+        self._session_ts = datetime.now()
+        self.filename = filename or f"data/test_results/feedback_collection_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._jsonl = None
+        self._validation_count = 0
+        # Column views of the validation feedback fields used by analyze_feedback
+        self._satisfaction_scores = array('B')
+        self._error_understanding = []
+        self._workflow_impact = []
+        self._transaction_speed = []
+        self._suggestions = []
+        
+    def _emit(self, section: str, record: Dict[str, Any]):
+        """Append one feedback record to the JSONL file as soon as it is collected."""
+        if self._jsonl is None:
+            # Ensure directory exists, skipping the check for directories already created
+            directory = os.path.dirname(self.filename)
+            # A bare filename has no directory part and goes in the working directory
+            if directory and directory not in FeedbackCollector._created_dirs:
+                os.makedirs(directory, exist_ok=True)
+                FeedbackCollector._created_dirs.add(directory)
+            self._jsonl = open(self.filename, 'ab', buffering=1 << 16)
         
+        # orjson serializes the datetime timestamps natively
+        self._jsonl.write(orjson.dumps({'section': section, **record}) + b'\n')
+        # Flush per record so a crash mid-session keeps everything collected so far
+        self._jsonl.flush()
+    
+    def _record_validation_feedback(self, feedback: Dict[str, Any]):
+        """Emit a validation feedback record and update the analysis columns."""
+        self._emit('validation_feedback', feedback)
+        self._validation_count += 1
+        
+        score = feedback.get('overall_satisfaction')
+        if score is not None:
+            self._satisfaction_scores.append(score)
+        self._error_understanding.append(feedback.get('error_understanding'))
+        self._workflow_impact.append(feedback.get('workflow_impact'))
+        self._transaction_speed.append(feedback.get('transaction_speed'))
+        for field in ('additional_features', 'usability_improvements'):
+            if feedback.get(field):
+                self._suggestions.append(feedback[field])
+    
     def collect_admin_feedback(self) -> Dict[str, Any]:
         """Collect feedback from system administrators."""
-        print("\n🔐 ADMIN FEEDBACK COLLECTION")
-        print("=" * 50)
+        print("\n🔐 ADMIN FEEDBACK COLLECTION\n" + "=" * 50)
         
         feedback = {
             'role': 'admin',
-            'timestamp': datetime.now().isoformat(),
-            'validation_confidence': self._get_rating("How confident are you in the system's data validation? (1-5)"),
-            'error_message_clarity': self._get_yes_no("Are error messages clear and actionable?"),
-            'master_election_reliability': self._get_yes_no("Does the master election process work reliably?"),
-            'audit_log_sufficiency': self._get_yes_no("Are audit logs sufficient for compliance?"),
-            'additional_features': self._get_text("What additional validation features do you need?"),
-            'security_concerns': self._get_text("Any security concerns with the current validation?"),
-            'compliance_requirements': self._get_text("Any compliance requirements not met?")
+            'timestamp': self._session_ts,
+            **self._ask_all([
+                ('validation_confidence', self._rating("How confident are you in the system's data validation? (1-5)")),
+                ('error_message_clarity', self._yes_no("Are error messages clear and actionable?")),
+                ('master_election_reliability', self._yes_no("Does the master election process work reliably?")),
+                ('audit_log_sufficiency', self._yes_no("Are audit logs sufficient for compliance?")),
+                ('additional_features', self._text("What additional validation features do you need?")),
+                ('security_concerns', self._text("Any security concerns with the current validation?")),
+                ('compliance_requirements', self._text("Any compliance requirements not met?"))
+            ])
         }
         
-        self.feedback_data['validation_feedback'].append(feedback)
+        self._record_validation_feedback(feedback)
         return feedback
     
     def collect_manager_feedback(self) -> Dict[str, Any]:
         """Collect feedback from store managers."""
-        print("\n👔 MANAGER FEEDBACK COLLECTION")
-        print("=" * 50)
+        print("\n👔 MANAGER FEEDBACK COLLECTION\n" + "=" * 50)
         
         feedback = {
             'role': 'manager',
-            'timestamp': datetime.now().isoformat(),
-            'workflow_impact': self._get_choice("How does the validation affect your daily workflow?", 
-                                              ["Positive", "Negative", "Neutral"]),
-            'conflict_resolution': self._get_yes_no("Are data conflicts resolved satisfactorily?"),
-            'sync_status_helpful': self._get_yes_no("Is the sync status display helpful?"),
-            'team_improvements': self._get_text("What validation improvements would help your team?"),
-            'data_consistency': self._get_rating("Rate data consistency across devices (1-5)"),
-            'operational_efficiency': self._get_rating("Rate operational efficiency with current validation (1-5)")
+            'timestamp': self._session_ts,
+            **self._ask_all([
+                ('workflow_impact', self._choice("How does the validation affect your daily workflow?",
+                                                 ["Positive", "Negative", "Neutral"])),
+                ('conflict_resolution', self._yes_no("Are data conflicts resolved satisfactorily?")),
+                ('sync_status_helpful', self._yes_no("Is the sync status display helpful?")),
+                ('team_improvements', self._text("What validation improvements would help your team?")),
+                ('data_consistency', self._rating("Rate data consistency across devices (1-5)")),
+                ('operational_efficiency', self._rating("Rate operational efficiency with current validation (1-5)"))
+            ])
         }
         
-        self.feedback_data['validation_feedback'].append(feedback)
+        self._record_validation_feedback(feedback)
         return feedback
     
     def collect_assistant_manager_feedback(self) -> Dict[str, Any]:
         """Collect feedback from assistant managers."""
-        print("\n👨‍💼 ASSISTANT MANAGER FEEDBACK COLLECTION")
-        print("=" * 50)
+        print("\n👨‍💼 ASSISTANT MANAGER FEEDBACK COLLECTION\n" + "=" * 50)
         
         feedback = {
             'role': 'assistant_manager',
-            'timestamp': datetime.now().isoformat(),
-            'team_monitoring': self._get_yes_no("Can you effectively monitor team activities?"),
-            'error_handling': self._get_yes_no("Are validation errors handled gracefully?"),
-            'peak_performance': self._get_yes_no("Is the system responsive during peak usage?"),
-            'oversight_features': self._get_text("What additional oversight features do you need?"),
-            'communication_effectiveness': self._get_rating("Rate communication effectiveness (1-5)"),
-            'coordination_ease': self._get_rating("Rate team coordination ease (1-5)")
+            'timestamp': self._session_ts,
+            **self._ask_all([
+                ('team_monitoring', self._yes_no("Can you effectively monitor team activities?")),
+                ('error_handling', self._yes_no("Are validation errors handled gracefully?")),
+                ('peak_performance', self._yes_no("Is the system responsive during peak usage?")),
+                ('oversight_features', self._text("What additional oversight features do you need?")),
+                ('communication_effectiveness', self._rating("Rate communication effectiveness (1-5)")),
+                ('coordination_ease', self._rating("Rate team coordination ease (1-5)"))
+            ])
         }
         
-        self.feedback_data['validation_feedback'].append(feedback)
+        self._record_validation_feedback(feedback)
         return feedback
     
     def collect_sales_assistant_feedback(self) -> Dict[str, Any]:
         """Collect feedback from sales assistants."""
-        print("\n🛍️ SALES ASSISTANT FEEDBACK COLLECTION")
-        print("=" * 50)
+        print("\n🛍️ SALES ASSISTANT FEEDBACK COLLECTION\n" + "=" * 50)
         
         feedback = {
             'role': 'sales_assistant',
-            'timestamp': datetime.now().isoformat(),
-            'work_slowdown': self._get_choice("Do validation errors slow down your work?", 
-                                            ["Yes", "No", "Sometimes"]),
-            'error_understanding': self._get_yes_no("Are error messages easy to understand?"),
-            'transaction_speed': self._get_choice("Does the system respond quickly during transactions?", 
-                                                ["Yes", "No", "Sometimes"]),
-            'usability_improvements': self._get_text("What would make the system easier to use?"),
-            'training_needs': self._get_text("What training do you need for the validation system?"),
-            'transaction_efficiency': self._get_rating("Rate transaction efficiency (1-5)")
+            'timestamp': self._session_ts,
+            **self._ask_all([
+                ('work_slowdown', self._choice("Do validation errors slow down your work?",
+                                               ["Yes", "No", "Sometimes"])),
+                ('error_understanding', self._yes_no("Are error messages easy to understand?")),
+                ('transaction_speed', self._choice("Does the system respond quickly during transactions?",
+                                                   ["Yes", "No", "Sometimes"])),
+                ('usability_improvements', self._text("What would make the system easier to use?")),
+                ('training_needs', self._text("What training do you need for the validation system?")),
+                ('transaction_efficiency', self._rating("Rate transaction efficiency (1-5)"))
+            ])
         }
         
-        self.feedback_data['validation_feedback'].append(feedback)
+        self._record_validation_feedback(feedback)
         return feedback
     
     def test_validation_scenarios(self) -> Dict[str, Any]:
         """Test validation scenarios and collect feedback."""
-        print("\n🧪 VALIDATION SCENARIO TESTING")
-        print("=" * 50)
+        print("\n🧪 VALIDATION SCENARIO TESTING\n" + "=" * 50)
         
-        scenarios = [
-            {
-                'name': 'Invalid Device ID',
-                'data': {'device_id': 'test<script>', 'role': 'admin', 'priority': 100},
-                'expected': False
-            },
-            {
-                'name': 'Invalid Role',
-                'data': {'device_id': 'test', 'role': 'invalid_role', 'priority': 100},
-                'expected': False
-            },
-            {
-                'name': 'Invalid Priority',
-                'data': {'device_id': 'test', 'role': 'admin', 'priority': 150},
-                'expected': False
-            },
-            {
-                'name': 'Missing Fields',
-                'data': {'device_id': 'test', 'role': 'admin'},
-                'expected': False
-            },
-            {
-                'name': 'Valid Registration',
-                'data': {'device_id': 'test_device', 'role': 'admin', 'priority': 100},
-                'expected': True
-            }
-        ]
+        # Build the full results table first, then report and collect ratings
+        scenario_results = [self._evaluate_scenario(scenario) for scenario in _SCENARIOS]
         
-        scenario_results = []
-        for scenario in scenarios:
-            print(f"\nTesting: {scenario['name']}")
-            is_valid, error_msg, validated_data = validate_device_registration_data(scenario['data'])
-            
-            result = {
-                'scenario': scenario['name'],
-                'data': scenario['data'],
-                'expected_valid': scenario['expected'],
-                'actual_valid': is_valid,
-                'error_message': error_msg,
-                'passed': (is_valid == scenario['expected'])
-            }
-            
+        for result in scenario_results:
+            # Emit each scenario's report with a single write
+            lines = [f"\nTesting: {result['scenario']}"]
             if result['passed']:
-                print(f"✅ PASS: {scenario['name']}")
+                lines.append(f"✅ PASS: {result['scenario']}")
             else:
-                print(f"❌ FAIL: {scenario['name']}")
-                print(f"   Expected: {scenario['expected']}, Got: {is_valid}")
-                if error_msg:
-                    print(f"   Error: {error_msg}")
-            
-            scenario_results.append(result)
+                lines.append(f"❌ FAIL: {result['scenario']}")
+                lines.append(f"   Expected: {result['expected_valid']}, Got: {result['actual_valid']}")
+                if result['error_message']:
+                    lines.append(f"   Error: {result['error_message']}")
+            sys.stdout.write("\n".join(lines) + "\n")
             
             # Collect feedback on error messages
-            if not is_valid and error_msg:
-                clarity = self._get_rating(f"How clear is this error message? (1-5): '{error_msg}'")
-                helpfulness = self._get_rating(f"How helpful is this error message? (1-5): '{error_msg}'")
-                
-                result['error_clarity'] = clarity
-                result['error_helpfulness'] = helpfulness
+            error_msg = result['error_message']
+            if not result['actual_valid'] and error_msg:
+                result.update(self._ask_all([
+                    ('error_clarity', self._rating(f"How clear is this error message? (1-5): '{error_msg}'")),
+                    ('error_helpfulness', self._rating(f"How helpful is this error message? (1-5): '{error_msg}'"))
+                ]))
         
-        self.feedback_data['validation_feedback'].append({
+        self._record_validation_feedback({
             'type': 'scenario_testing',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self._session_ts,
             'scenarios': scenario_results
         })
         
         return {'scenarios': scenario_results}
     
+    def _evaluate_scenario(self, scenario: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate one scenario and build its result row."""
+        is_valid, error_msg, _ = cached_validate(tuple(sorted(scenario['data'].items())))
+        return {
+            'scenario': scenario['name'],
+            'data': dict(scenario['data']),
+            'expected_valid': scenario['expected'],
+            'actual_valid': is_valid,
+            'error_message': error_msg,
+            'passed': is_valid == scenario['expected']
+        }
+    
     def collect_performance_feedback(self) -> Dict[str, Any]:
         """Collect performance-related feedback."""
-        print("\n⚡ PERFORMANCE FEEDBACK COLLECTION")
-        print("=" * 50)
+        print("\n⚡ PERFORMANCE FEEDBACK COLLECTION\n" + "=" * 50)
         
         feedback = {
-            'timestamp': datetime.now().isoformat(),
-            'registration_speed': self._get_rating("Rate device registration speed (1-5)"),
-            'sync_speed': self._get_rating("Rate data sync speed (1-5)"),
-            'error_recovery_speed': self._get_rating("Rate error recovery speed (1-5)"),
-            'system_responsiveness': self._get_rating("Rate overall system responsiveness (1-5)"),
-            'performance_issues': self._get_text("Any specific performance issues?"),
-            'optimization_suggestions': self._get_text("Suggestions for performance improvements?")
+            'timestamp': self._session_ts,
+            **self._ask_all([
+                ('registration_speed', self._rating("Rate device registration speed (1-5)")),
+                ('sync_speed', self._rating("Rate data sync speed (1-5)")),
+                ('error_recovery_speed', self._rating("Rate error recovery speed (1-5)")),
+                ('system_responsiveness', self._rating("Rate overall system responsiveness (1-5)")),
+                ('performance_issues', self._text("Any specific performance issues?")),
+                ('optimization_suggestions', self._text("Suggestions for performance improvements?"))
+            ])
         }
         
-        self.feedback_data['performance_feedback'].append(feedback)
+        self._emit('performance_feedback', feedback)
         return feedback
     
     def collect_overall_satisfaction(self) -> Dict[str, Any]:
         """Collect overall satisfaction metrics."""
-        print("\n😊 OVERALL SATISFACTION SURVEY")
-        print("=" * 50)
+        print("\n😊 OVERALL SATISFACTION SURVEY\n" + "=" * 50)
         
         satisfaction = {
-            'timestamp': datetime.now().isoformat(),
-            'overall_satisfaction': self._get_rating("Overall satisfaction with validation system (1-5)"),
-            'system_reliability': self._get_rating("Rate system reliability (1-5)"),
-            'ease_of_use': self._get_rating("Rate ease of use (1-5)"),
-            'feature_completeness': self._get_rating("Rate feature completeness (1-5)"),
-            'recommendation_likelihood': self._get_rating("Likelihood to recommend to others (1-5)"),
-            'improvement_priority': self._get_choice("What should be the top priority for improvement?",
-                                                   ["Performance", "Usability", "Features", "Security", "Documentation"])
+            'timestamp': self._session_ts,
+            **self._ask_all([
+                ('overall_satisfaction', self._rating("Overall satisfaction with validation system (1-5)")),
+                ('system_reliability', self._rating("Rate system reliability (1-5)")),
+                ('ease_of_use', self._rating("Rate ease of use (1-5)")),
+                ('feature_completeness', self._rating("Rate feature completeness (1-5)")),
+                ('recommendation_likelihood', self._rating("Likelihood to recommend to others (1-5)")),
+                ('improvement_priority', self._choice("What should be the top priority for improvement?",
+                                                      ["Performance", "Usability", "Features", "Security", "Documentation"]))
+            ])
         }
         
-        self.feedback_data['overall_satisfaction'] = satisfaction
+        self._emit('overall_satisfaction', satisfaction)
         return satisfaction
     
     def analyze_feedback(self) -> Dict[str, Any]:
         """Analyze collected feedback and generate insights."""
-        print("\n📊 FEEDBACK ANALYSIS")
-        print("=" * 50)
+        print("\n📊 FEEDBACK ANALYSIS\n" + "=" * 50)
         
         analysis = {
-            'timestamp': datetime.now().isoformat(),
-            'total_responses': len(self.feedback_data['validation_feedback']),
+            'timestamp': self._session_ts,
+            'total_responses': self._validation_count,
             'average_satisfaction': 0,
             'common_issues': [],
+            'issue_counts': {},
             'improvement_suggestions': [],
             'priority_areas': []
         }
         
-        # Calculate average satisfaction
-        satisfaction_scores = []
-        for feedback in self.feedback_data['validation_feedback']:
-            if 'overall_satisfaction' in feedback:
-                satisfaction_scores.append(feedback['overall_satisfaction'])
-        
-        if satisfaction_scores:
-            analysis['average_satisfaction'] = sum(satisfaction_scores) / len(satisfaction_scores)
-        
-        # Identify common issues
-        issues = []
-        for feedback in self.feedback_data['validation_feedback']:
-            if 'error_understanding' in feedback and feedback['error_understanding'] == 'No':
-                issues.append('Error message clarity')
-            if 'workflow_impact' in feedback and feedback['workflow_impact'] == 'Negative':
-                issues.append('Workflow disruption')
-            if 'transaction_speed' in feedback and feedback['transaction_speed'] == 'No':
-                issues.append('Transaction speed')
+        if self._satisfaction_scores:
+            analysis['average_satisfaction'] = statistics.fmean(self._satisfaction_scores)
         
-        analysis['common_issues'] = list(set(issues))
-        
-        # Collect improvement suggestions
-        suggestions = []
-        for feedback in self.feedback_data['validation_feedback']:
-            if 'additional_features' in feedback and feedback['additional_features']:
-                suggestions.append(feedback['additional_features'])
-            if 'usability_improvements' in feedback and feedback['usability_improvements']:
-                suggestions.append(feedback['usability_improvements'])
+        # Count each issue over its column; unary + drops issues nobody reported
+        issues = +Counter({
+            'Error message clarity': self._error_understanding.count('No'),
+            'Workflow disruption': self._workflow_impact.count('Negative'),
+            'Transaction speed': self._transaction_speed.count('No')
+        })
         
-        analysis['improvement_suggestions'] = suggestions
+        # Most frequently reported issues first
+        analysis['common_issues'] = [issue for issue, _ in issues.most_common()]
+        analysis['issue_counts'] = dict(issues)
+        analysis['improvement_suggestions'] = list(self._suggestions)
         
         print(f"📈 Analysis Results:")
         print(f"   Total Responses: {analysis['total_responses']}")
@@ -271,62 +326,95 @@ class FeedbackCollector:
         
         return analysis
     
-    def save_feedback(self, filename: str = None) -> str:
-        """Save feedback data to JSON file."""
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"data/test_results/feedback_collection_{timestamp}.json"
+    def save_feedback(self) -> str:
+        """Flush and close the feedback JSONL file and return its name."""
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
         
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        print(f"\n💾 Feedback saved to: {self.filename}")
+        return self.filename
+    
+    def _ask_all(self, questions: List[Tuple[str, Question]]) -> Dict[str, Any]:
+        """
+        Ask a whole form of questions and validate the answers afterwards.
         
-        with open(filename, 'w') as f:
-            json.dump(self.feedback_data, f, indent=2)
+        The numbered question list is printed up front and one answer is read
+        per question. Answers that fail validation are re-asked together until
+        every answer is valid.
         
-        print(f"\n💾 Feedback saved to: {filename}")
-        return filename
-    
-    def _get_rating(self, question: str) -> int:
-        """Get a rating from 1-5."""
-        while True:
-            try:
-                response = input(f"{question} (1-5): ").strip()
-                rating = int(response)
-                if 1 <= rating <= 5:
-                    return rating
-                else:
-                    print("Please enter a number between 1 and 5.")
-            except ValueError:
-                print("Please enter a valid number.")
-    
-    def _get_yes_no(self, question: str) -> str:
-        """Get a Yes/No/Partially response."""
-        while True:
-            response = input(f"{question} (Yes/No/Partially): ").strip().lower()
-            if response in ['yes', 'no', 'partially']:
-                return response.capitalize()
-            else:
-                print("Please enter Yes, No, or Partially.")
-    
-    def _get_choice(self, question: str, choices: List[str]) -> str:
-        """Get a choice from a list of options."""
-        print(f"{question}")
-        for i, choice in enumerate(choices, 1):
-            print(f"  {i}. {choice}")
+        Args:
+            questions: List of (field, question) pairs built with _rating,
+                _yes_no, _choice or _text
+            
+        Returns:
+            Dictionary mapping each field to its parsed answer, in question order
+        """
+        for number, (_, (question, hint, _)) in enumerate(questions, 1):
+            print(f"  {number}. {question} {hint}".rstrip())
         
-        while True:
-            try:
-                response = int(input(f"Enter choice (1-{len(choices)}): ").strip())
-                if 1 <= response <= len(choices):
-                    return choices[response - 1]
+        answers = {}
+        pending = list(range(len(questions)))
+        while pending:
+            responses = []
+            for index in pending:
+                hint = questions[index][1][1]
+                prompt = f"[{index + 1}] {hint}: " if hint else f"[{index + 1}]: "
+                responses.append((index, input(prompt).strip()))
+            
+            pending = []
+            for index, response in responses:
+                field, (_, _, parse) = questions[index]
+                answer = parse(response)
+                if answer is None:
+                    pending.append(index)
                 else:
-                    print(f"Please enter a number between 1 and {len(choices)}.")
-            except ValueError:
-                print("Please enter a valid number.")
+                    answers[field] = answer
+            
+            if pending:
+                print(f"Please re-enter answers {', '.join(str(index + 1) for index in pending)}.")
+        
+        return {field: answers[field] for field, _ in questions}
+    
+    def _rating(self, question: str) -> Question:
+        """Build a 1-5 rating question."""
+        return question, "(1-5)", self._parse_rating
+    
+    def _yes_no(self, question: str) -> Question:
+        """Build a Yes/No/Partially question."""
+        return question, "(Yes/No/Partially)", self._parse_yes_no
+    
+    def _choice(self, question: str, choices: List[str]) -> Question:
+        """Build a question answered by picking one of choices."""
+        options = " / ".join(f"{i}. {choice}" for i, choice in enumerate(choices, 1))
+        return question, f"({options})", functools.partial(self._parse_choice, choices=choices)
+    
+    def _text(self, question: str) -> Question:
+        """Build a free-text question."""
+        return question, "", self._parse_text
+    
+    def _parse_rating(self, response: str) -> Optional[int]:
+        """Parse a rating from 1-5, returning None if invalid."""
+        # A valid rating is a single digit, so compare characters instead of calling int()
+        if len(response) == 1 and '1' <= response <= '5':
+            return ord(response) - ord('0')
+        return None
+    
+    def _parse_yes_no(self, response: str) -> Optional[str]:
+        """Parse a Yes/No/Partially response, returning None if invalid."""
+        return _YES_NO_ANSWERS.get(response.lower())
+    
+    def _parse_choice(self, response: str, choices: List[str]) -> Optional[str]:
+        """Parse a numbered choice, returning None if invalid."""
+        try:
+            index = int(response)
+        except ValueError:
+            return None
+        return choices[index - 1] if 1 <= index <= len(choices) else None
     
-    def _get_text(self, question: str) -> str:
-        """Get a text response."""
-        return input(f"{question}: ").strip()
+    def _parse_text(self, response: str) -> str:
+        """Accept any text response."""
+        return response
 
 
 def main():
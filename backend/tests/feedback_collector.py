@@ -3,24 +3,38 @@
 Simple Feedback Collector for UAT Step 15.4
 """
 
-import json
+import argparse
 import sys
 import os
+import time
+import orjson
 from datetime import datetime
 
 # Add the backend directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.utils.validation import validate_device_registration_data
+from tests.script_helpers import cached_validate
 
 
-def collect_feedback():
-    """Collect user feedback for validation improvements."""
+# Device registration scenarios checked after each feedback session
+_SCENARIOS = (
+    {'name': 'Invalid Device ID', 'data': {'device_id': 'test<script>', 'role': 'admin', 'priority': 100}},
+    {'name': 'Valid Registration', 'data': {'device_id': 'test_device', 'role': 'admin', 'priority': 100}}
+)
+
+
+def collect_feedback(pretty: bool = False):
+    """
+    Collect user feedback for validation improvements.
+    
+    Args:
+        pretty: Indent the saved JSON for human review instead of writing it compact
+    """
     print("📊 UAT Feedback Collection - Step 15.4")
     print("=" * 50)
     
     feedback = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': datetime.now(),
         'role': input("Enter your role (admin/manager/assistant_manager/sales_assistant): "),
         'validation_confidence': int(input("How confident are you in the system's data validation? (1-5): ")),
         'error_message_clarity': input("Are error messages clear and actionable? (Yes/No/Partially): "),
@@ -32,14 +46,9 @@ def collect_feedback():
     
     # Test validation scenarios
     print("\n🧪 Testing Validation Scenarios...")
-    scenarios = [
-        {'name': 'Invalid Device ID', 'data': {'device_id': 'test<script>', 'role': 'admin', 'priority': 100}},
-        {'name': 'Valid Registration', 'data': {'device_id': 'test_device', 'role': 'admin', 'priority': 100}}
-    ]
-    
     scenario_results = []
-    for scenario in scenarios:
-        is_valid, error_msg, validated_data = validate_device_registration_data(scenario['data'])
+    for scenario in _SCENARIOS:
+        is_valid, error_msg, validated_data = cached_validate(tuple(sorted(scenario['data'].items())))
         result = {
             'scenario': scenario['name'],
             'valid': is_valid,
@@ -51,17 +60,19 @@ def collect_feedback():
     feedback['scenario_results'] = scenario_results
     
     # Save feedback
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     filename = f"data/test_results/feedback_{timestamp}.json"
     
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     
-    with open(filename, 'w') as f:
-        json.dump(feedback, f, indent=2)
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(feedback, option=orjson.OPT_INDENT_2 if pretty else None))
     
     print(f"\n💾 Feedback saved to: {filename}")
     return feedback
 
 
 if __name__ == '__main__':
-    collect_feedback() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect UAT feedback for validation improvements.")
+    parser.add_argument('--pretty', action='store_true', help="indent the saved JSON for human review")
+    collect_feedback(pretty=parser.parse_args().pretty) 
\ No newline at end of file
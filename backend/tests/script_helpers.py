@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the standalone UAT, feedback and failover scripts in this directory.
+"""
+
+import functools
+import json
+import os
+from typing import Any
+
+
+def write_json_atomic(path: str, data: Any):
+    """Write JSON to a temporary file and swap it into place so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", buffering=1 << 20) as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@functools.lru_cache(maxsize=256)
+def cached_validate(frozen_items: tuple):
+    """Validate device registration data passed as a sorted tuple of its items."""
+    # Imported here so sessions that never run the scenarios skip loading the app package
+    from app.utils.validation import validate_device_registration_data
+    return validate_device_registration_data(dict(frozen_items))
+
+
+def clear_validation_cache():
+    """Drop memoized validation results."""
+    cached_validate.cache_clear()
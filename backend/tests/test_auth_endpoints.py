@@ -6,70 +6,231 @@ This module tests all authentication endpoints including login, logout,
 registration, token refresh, and session management.
 """
 
-import json
+import os
+import orjson
 import pytest
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
+from sqlalchemy import inspect
+from sqlalchemy.pool import StaticPool
 
-from app import create_app
+from app.extensions import db
 from app.models import User, Role, UserRole
 from app.services import AuthService, SessionService
+from tests.db_helpers import apply_test_pragmas, enable_sqlite_savepoints, JoinedSession
+
+def _database_uri():
+    """
+    Use a fresh in-memory database unless RMS_REUSE_DB=1 asks to keep the
+    schema in a file under instance/ between runs (one file per xdist worker).
+    """
+    if os.environ.get('RMS_REUSE_DB') != '1':
+        return 'sqlite:///:memory:'
+    instance_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'instance'))
+    os.makedirs(instance_dir, exist_ok=True)
+    worker = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+    return 'sqlite:///' + os.path.join(instance_dir, f'test_reuse_{worker}.db')
+
+
+TEST_CONFIG = {
+    'TESTING': True,
+    # Perf-only: a single PBKDF2 iteration for every password this app hashes
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1',
+    'SQLALCHEMY_DATABASE_URI': _database_uri(),
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    # One shared connection so an in-memory schema is visible to every request
+    'SQLALCHEMY_ENGINE_OPTIONS': {
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False}
+    }
+}
+
+# Admin shared by the read-only tests in TestAdminSessionEndpoints
+ADMIN_DATA = {
+    'username': 'testadmin',
+    'password': 'TestAdmin123!',
+    'email': 'testadmin@test.com',
+    'full_name': 'Test Admin',
+    'device_id': 'test-device'
+}
+
+# Request bodies encoded once at import instead of on every request
+PAYLOADS = {name: orjson.dumps(body) for name, body in {
+    'admin': ADMIN_DATA,
+    'new_admin': {
+        'username': 'newadmin',
+        'password': 'NewAdmin123!',
+        'email': 'newadmin@test.com',
+        'full_name': 'New Admin User',
+        'device_id': 'test-device-1'
+    },
+    'admin1': {
+        'username': 'admin1',
+        'password': 'Admin123!',
+        'email': 'admin1@test.com',
+        'full_name': 'Admin 1',
+        'device_id': 'device-1'
+    },
+    'admin2': {
+        'username': 'admin2',
+        'password': 'Admin123!',
+        'email': 'admin2@test.com',
+        'full_name': 'Admin 2',
+        'device_id': 'device-2'
+    },
+    'invalid_login': {
+        'username': 'nonexistent',
+        'password': 'wrongpassword'
+    },
+    'missing_password_login': {
+        'username': 'testuser'
+        # Missing password
+    },
+    'wrong_current_password': {
+        'current_password': 'wrongpassword',
+        'new_password': 'NewPass123!'
+    },
+    'empty': {}
+}.items()}
+
+# (method, endpoint, body, expected) for requests made with the shared admin's
+# token; ANY only requires the key to be present
+ADMIN_ENDPOINT_CASES = [
+    pytest.param('POST', '/api/auth/login',
+                 orjson.dumps({'username': 'testadmin', 'password': 'TestAdmin123!', 'device_id': 'test-device'}),
+                 {'success': True, 'token': ANY, 'user': ANY, 'session': ANY},
+                 id='login'),
+    pytest.param('POST', '/api/auth/logout',
+                 orjson.dumps({'device_id': 'test-device'}),
+                 {'success': True, 'message': 'Logged out successfully'},
+                 id='logout'),
+    pytest.param('POST', '/api/auth/refresh',
+                 orjson.dumps({'device_id': 'test-device'}),
+                 {'success': True, 'token': ANY, 'expires_at': ANY},
+                 id='refresh'),
+    pytest.param('POST', '/api/auth/change-password',
+                 orjson.dumps({'current_password': 'TestAdmin123!', 'new_password': 'NewPass123!'}),
+                 {'success': True, 'message': 'Password changed successfully'},
+                 id='change-password'),
+    pytest.param('GET', '/api/auth/profile', None,
+                 {'success': True, 'user': ANY},
+                 id='profile'),
+    pytest.param('GET', '/api/auth/sessions', None,
+                 {'success': True, 'sessions': ANY},
+                 id='sessions'),
+    pytest.param('DELETE', '/api/auth/sessions/1', None,
+                 {'success': True, 'message': 'User logged out successfully'},
+                 id='force-logout'),
+    pytest.param('GET', '/api/auth/verify', None,
+                 {'valid': True, 'user': ANY},
+                 id='verify'),
+]
+
+
+@pytest.fixture(scope='session')
+def app(make_app):
+    """Create the test app, schema and seed roles once for the whole run."""
+    app = make_app(TEST_CONFIG)
+    with app.app_context():
+        apply_test_pragmas(db.engine)
+        enable_sqlite_savepoints(db.engine)
+        # A reused database already has the schema; tests never commit past it
+        if not inspect(db.engine).has_table('users'):
+            db.create_all()
+        _create_test_data()
+    return app
+
+
+@contextmanager
+def _joined_session(app, connection):
+    """Bind db.session to ``connection`` so app commits only release SAVEPOINTs."""
+    with app.app_context():
+        app_session = db.session
+        db.session = db._make_scoped_session({
+            'class_': JoinedSession,
+            'bind': connection,
+            'join_transaction_mode': 'create_savepoint',
+            # Everything is rolled back anyway; skip reloading rows after each commit
+            'expire_on_commit': False
+        })
+        try:
+            yield
+        finally:
+            db.session.remove()
+            db.session = app_session
+
+
+def _open_transaction(app):
+    """Yield a connection inside an outer transaction that is always rolled back."""
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        try:
+            yield connection
+        finally:
+            transaction.rollback()
+            connection.close()
+
+
+@pytest.fixture
+def db_connection(app):
+    """Per-test outer transaction; classes can swap in class_db_connection to share state."""
+    yield from _open_transaction(app)
+
+
+@pytest.fixture
+def client(app, db_connection):
+    """Create test client whose writes are rolled back after each test."""
+    savepoint = db_connection.begin_nested()
+    try:
+        with _joined_session(app, db_connection), app.test_client() as client:
+            yield client
+    finally:
+        savepoint.rollback()
+
+
+@pytest.fixture(scope='class')
+def class_db_connection(app):
+    """Outer transaction shared by every test in a class."""
+    yield from _open_transaction(app)
+
+
+@pytest.fixture(scope='class')
+def admin_token(app, class_db_connection):
+    """Register the shared admin once per class and return its token."""
+    with _joined_session(app, class_db_connection), app.test_client() as client:
+        response = client.post('/api/auth/register',
+                             data=PAYLOADS['admin'],
+                             content_type='application/json')
+        assert response.status_code == 201
+        return response.get_json()['token']
+
+
+def _create_test_data():
+    """Create test data for authentication tests."""
+    # Seed any missing Admin/Manager roles in a single insert and commit
+    existing = {name for (name,) in db.session.query(Role.name).all()}
+    needed = [
+        {'name': name, 'description': f'{name} role'}
+        for name in ('Admin', 'Manager')
+        if name not in existing
+    ]
+    if needed:
+        db.session.bulk_insert_mappings(Role, needed)
+        db.session.commit()
+    
+    # Note: We don't create admin users by default to allow registration tests
+    # Admin users will be created by individual tests as needed
+
 
 class TestAuthEndpoints:
     """Test authentication REST endpoints."""
     
-    @pytest.fixture
-    def app(self):
-        """Create test app."""
-        config = {
-            'TESTING': True,
-            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
-            'SQLALCHEMY_TRACK_MODIFICATIONS': False
-        }
-        app = create_app(config)
-        return app
-    
-    @pytest.fixture
-    def client(self, app):
-        """Create test client."""
-        with app.test_client() as client:
-            with app.app_context():
-                # Set up database
-                from app.extensions import db
-                db.create_all()
-                
-                # Create test data
-                self._create_test_data()
-                
-                yield client
-    
-    def _create_test_data(self):
-        """Create test data for authentication tests."""
-        from app.extensions import db
-        
-        # Check if Admin role exists, create if not
-        admin_role = db.session.query(Role).filter(Role.name == "Admin").first()
-        if not admin_role:
-            admin_role = Role(name="Admin", description="Admin role")
-            db.session.add(admin_role)
-            db.session.commit()
-            db.session.refresh(admin_role)
-        
-        # Check if Manager role exists, create if not
-        manager_role = db.session.query(Role).filter(Role.name == "Manager").first()
-        if not manager_role:
-            manager_role = Role(name="Manager", description="Manager role")
-            db.session.add(manager_role)
-            db.session.commit()
-            db.session.refresh(manager_role)
-        
-        # Note: We don't create admin users by default to allow registration tests
-        # Admin users will be created by individual tests as needed
-    
     def test_check_network_no_admin(self, client):
         """Test network check when no admin exists."""
         response = client.get('/api/auth/check-network')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 200
         assert data['admin_exists'] == False
@@ -77,18 +238,10 @@ class TestAuthEndpoints:
     
     def test_register_first_admin(self, client):
         """Test first admin registration."""
-        admin_data = {
-            'username': 'newadmin',
-            'password': 'NewAdmin123!',
-            'email': 'newadmin@test.com',
-            'full_name': 'New Admin User',
-            'device_id': 'test-device-1'
-        }
-        
         response = client.post('/api/auth/register',
-                             data=json.dumps(admin_data),
+                             data=PAYLOADS['new_admin'],
                              content_type='application/json')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 201
         assert data['success'] == True
@@ -100,362 +253,64 @@ class TestAuthEndpoints:
     def test_register_second_admin_fails(self, client):
         """Test that second admin registration fails."""
         # First admin registration
-        admin_data1 = {
-            'username': 'admin1',
-            'password': 'Admin123!',
-            'email': 'admin1@test.com',
-            'full_name': 'Admin 1',
-            'device_id': 'device-1'
-        }
-        
         response1 = client.post('/api/auth/register',
-                               data=json.dumps(admin_data1),
+                               data=PAYLOADS['admin1'],
                                content_type='application/json')
         
         assert response1.status_code == 201
         
         # Second admin registration should fail
-        admin_data2 = {
-            'username': 'admin2',
-            'password': 'Admin123!',
-            'email': 'admin2@test.com',
-            'full_name': 'Admin 2',
-            'device_id': 'device-2'
-        }
-        
         response2 = client.post('/api/auth/register',
-                               data=json.dumps(admin_data2),
+                               data=PAYLOADS['admin2'],
                                content_type='application/json')
-        data2 = json.loads(response2.data)
+        data2 = response2.get_json()
         
         assert response2.status_code == 400
         assert 'already exists' in data2['error']
     
-    def test_login_success(self, client):
-        """Test successful user login."""
-        # First register an admin
-        admin_data = {
-            'username': 'testadmin',
-            'password': 'TestAdmin123!',
-            'email': 'testadmin@test.com',
-            'full_name': 'Test Admin',
-            'device_id': 'test-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        
-        # Now login
-        login_data = {
-            'username': 'testadmin',
-            'password': 'TestAdmin123!',
-            'device_id': 'test-device'
-        }
-        
-        response = client.post('/api/auth/login',
-                             data=json.dumps(login_data),
-                             content_type='application/json')
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert 'token' in data
-        assert data['user']['username'] == 'testadmin'
-        assert 'Admin' in data['user']['roles']
-        assert 'session' in data
-    
     def test_login_invalid_credentials(self, client):
         """Test login with invalid credentials."""
-        login_data = {
-            'username': 'nonexistent',
-            'password': 'wrongpassword'
-        }
-        
         response = client.post('/api/auth/login',
-                             data=json.dumps(login_data),
+                             data=PAYLOADS['invalid_login'],
                              content_type='application/json')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 401
         assert 'error' in data
     
     def test_login_missing_fields(self, client):
         """Test login with missing required fields."""
-        login_data = {
-            'username': 'testuser'
-            # Missing password
-        }
-        
         response = client.post('/api/auth/login',
-                             data=json.dumps(login_data),
+                             data=PAYLOADS['missing_password_login'],
                              content_type='application/json')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 400
         assert 'Missing required fields' in data['error']
     
-    def test_logout_success(self, client):
-        """Test successful logout."""
-        # First register and login
-        admin_data = {
-            'username': 'logoutadmin',
-            'password': 'Logout123!',
-            'email': 'logout@test.com',
-            'full_name': 'Logout Admin',
-            'device_id': 'logout-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Logout
-        logout_data = {
-            'device_id': 'logout-device'
-        }
-        
-        response = client.post('/api/auth/logout',
-                             data=json.dumps(logout_data),
-                             content_type='application/json',
-                             headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert data['message'] == 'Logged out successfully'
-    
     def test_logout_no_token(self, client):
         """Test logout without authorization token."""
         response = client.post('/api/auth/logout',
-                             data=json.dumps({}),
+                             data=PAYLOADS['empty'],
                              content_type='application/json')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 401
         assert 'Authorization token required' in data['error']
     
-    def test_refresh_token_success(self, client):
-        """Test successful token refresh."""
-        # First register and login
-        admin_data = {
-            'username': 'refreshadmin',
-            'password': 'Refresh123!',
-            'email': 'refresh@test.com',
-            'full_name': 'Refresh Admin',
-            'device_id': 'refresh-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Refresh token
-        refresh_data = {
-            'device_id': 'refresh-device'
-        }
-        
-        response = client.post('/api/auth/refresh',
-                             data=json.dumps(refresh_data),
-                             content_type='application/json',
-                             headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert 'token' in data
-        assert 'expires_at' in data
-    
-    def test_change_password_success(self, client):
-        """Test successful password change."""
-        # First register and login
-        admin_data = {
-            'username': 'passadmin',
-            'password': 'OldPass123!',
-            'email': 'pass@test.com',
-            'full_name': 'Password Admin',
-            'device_id': 'pass-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Change password
-        password_data = {
-            'current_password': 'OldPass123!',
-            'new_password': 'NewPass123!'
-        }
-        
-        response = client.post('/api/auth/change-password',
-                             data=json.dumps(password_data),
-                             content_type='application/json',
-                             headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert data['message'] == 'Password changed successfully'
-    
-    def test_change_password_wrong_current(self, client):
-        """Test password change with wrong current password."""
-        # First register and login
-        admin_data = {
-            'username': 'wrongpassadmin',
-            'password': 'Correct123!',
-            'email': 'wrongpass@test.com',
-            'full_name': 'Wrong Pass Admin',
-            'device_id': 'wrongpass-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Change password with wrong current password
-        password_data = {
-            'current_password': 'wrongpassword',
-            'new_password': 'NewPass123!'
-        }
-        
-        response = client.post('/api/auth/change-password',
-                             data=json.dumps(password_data),
-                             content_type='application/json',
-                             headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 400
-        assert 'Current password is incorrect' in data['error']
-    
-    def test_get_profile_success(self, client):
-        """Test successful profile retrieval."""
-        # First register and login
-        admin_data = {
-            'username': 'profileadmin',
-            'password': 'Profile123!',
-            'email': 'profile@test.com',
-            'full_name': 'Profile Admin',
-            'device_id': 'profile-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Get profile
-        response = client.get('/api/auth/profile',
-                            headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert data['user']['username'] == 'profileadmin'
-        assert data['user']['email'] == 'profile@test.com'
-        assert 'Admin' in data['user']['roles']
-    
     def test_get_profile_no_token(self, client):
         """Test profile retrieval without token."""
         response = client.get('/api/auth/profile')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 401
         assert 'Authorization token required' in data['error']
     
-    def test_get_sessions_admin_only(self, client):
-        """Test that sessions endpoint requires admin access."""
-        # First register and login
-        admin_data = {
-            'username': 'sessionsadmin',
-            'password': 'Sessions123!',
-            'email': 'sessions@test.com',
-            'full_name': 'Sessions Admin',
-            'device_id': 'sessions-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Get sessions (should work for admin)
-        response = client.get('/api/auth/sessions',
-                            headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert 'sessions' in data
-    
-    def test_force_logout_user_admin_only(self, client):
-        """Test force logout endpoint requires admin access."""
-        # First register and login
-        admin_data = {
-            'username': 'forcelogoutadmin',
-            'password': 'ForceLogout123!',
-            'email': 'forcelogout@test.com',
-            'full_name': 'Force Logout Admin',
-            'device_id': 'forcelogout-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Force logout user (should work for admin)
-        response = client.delete('/api/auth/sessions/1',
-                               headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['success'] == True
-        assert data['message'] == 'User logged out successfully'
-    
-    def test_verify_token_valid(self, client):
-        """Test token verification with valid token."""
-        # First register and login
-        admin_data = {
-            'username': 'verifyadmin',
-            'password': 'Verify123!',
-            'email': 'verify@test.com',
-            'full_name': 'Verify Admin',
-            'device_id': 'verify-device'
-        }
-        
-        register_response = client.post('/api/auth/register',
-                                      data=json.dumps(admin_data),
-                                      content_type='application/json')
-        register_data = json.loads(register_response.data)
-        token = register_data['token']
-        
-        # Verify token
-        response = client.get('/api/auth/verify',
-                            headers={'Authorization': f'Bearer {token}'})
-        data = json.loads(response.data)
-        
-        assert response.status_code == 200
-        assert data['valid'] == True
-        assert data['user']['username'] == 'verifyadmin'
-        assert data['user']['email'] == 'verify@test.com'
-        assert 'Admin' in data['user']['roles']
-    
     def test_verify_token_invalid(self, client):
         """Test token verification with invalid token."""
         response = client.get('/api/auth/verify',
                             headers={'Authorization': 'Bearer invalid_token'})
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 200
         assert data['valid'] == False
@@ -464,7 +319,7 @@ class TestAuthEndpoints:
     def test_verify_token_no_token(self, client):
         """Test token verification without token."""
         response = client.get('/api/auth/verify')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 200
         assert data['valid'] == False
@@ -475,7 +330,7 @@ class TestAuthEndpoints:
         response = client.post('/api/auth/login',
                              data='invalid json',
                              content_type='application/json')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 400
         assert 'Request body is required' in data['error']
@@ -485,11 +340,54 @@ class TestAuthEndpoints:
         response = client.post('/api/auth/login',
                              data='{"username": "test", "password": "test"}',
                              content_type='text/plain')
-        data = json.loads(response.data)
+        data = response.get_json()
         
         assert response.status_code == 400
         assert 'Content-Type must be application/json' in data['error']
 
+
+class TestAdminSessionEndpoints:
+    """Test endpoints that only need an already registered admin."""
+    
+    @pytest.fixture
+    def db_connection(self, class_db_connection):
+        """Run every test on the class-wide transaction holding the admin."""
+        return class_db_connection
+    
+    @pytest.fixture
+    def admin_client(self, client, admin_token):
+        """Test client that sends the shared admin's token on every request."""
+        client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {admin_token}'
+        return client
+    
+    @pytest.mark.parametrize('method,endpoint,body,expected', ADMIN_ENDPOINT_CASES)
+    def test_admin_endpoint(self, admin_client, method, endpoint, body, expected):
+        """Test that each endpoint succeeds for the registered admin."""
+        response = admin_client.open(endpoint,
+                                   method=method,
+                                   data=body,
+                                   content_type='application/json')
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        for key, value in expected.items():
+            assert key in data
+            assert data[key] == value
+        if 'user' in expected:
+            assert data['user']['username'] == ADMIN_DATA['username']
+            assert data['user']['email'] == ADMIN_DATA['email']
+            assert 'Admin' in data['user']['roles']
+    
+    def test_change_password_wrong_current(self, admin_client):
+        """Test password change with wrong current password."""
+        response = admin_client.post('/api/auth/change-password',
+                                   data=PAYLOADS['wrong_current_password'],
+                                   content_type='application/json')
+        data = response.get_json()
+        
+        assert response.status_code == 400
+        assert 'Current password is incorrect' in data['error']
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, '-v']) 
\ No newline at end of file
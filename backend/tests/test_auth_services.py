@@ -1,410 +1,259 @@
 #!/usr/bin/env python3
 """
-Test script for authentication services.
-This script verifies that all authentication services work correctly.
+Tests for authentication services.
+These tests verify that all authentication services work correctly.
 """
 
-import sys
-import os
-
-# Add the backend directory to the Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import pytest
 
 from app.services import AuthService, AuthorizationService, SessionService
-from app.models import User, Role, Permission, UserRole, RolePermission, AuditLog
-from app.models.base import Base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import bcrypt
+from app.models import User, Role, Permission, UserRole, RolePermission
+from sqlalchemy import insert
 import jwt
-from datetime import datetime, timedelta
 
 
-def test_auth_service():
-    """Test AuthService functionality."""
-    print("\n✅ Testing AuthService...")
+LOGIN_CASES = [
+    pytest.param("testuser", "SecurePass123!", True, None, id="valid"),
+    pytest.param("testuser", "wrongpassword", False, "Invalid username or password", id="wrong-password"),
+    pytest.param("nobody", "SecurePass123!", False, "Invalid username or password", id="unknown-user"),
+]
+
+# Applied in order to one database: the first admin wins, later ones are refused
+NETWORK_ADMIN_STEPS = [
+    ({
+        'username': 'network_admin',
+        'email': 'admin@example.com',
+        'password': 'AdminPass123!',
+        'first_name': 'Network',
+        'last_name': 'Admin'
+    }, "first-device", True, None),
+    ({
+        'username': 'second_admin',
+        'email': 'admin2@example.com',
+        'password': 'AdminPass123!',
+        'first_name': 'Second',
+        'last_name': 'Admin'
+    }, "second-device", False, "already exists"),
+]
+
+
+@pytest.fixture
+def auth_service(seeded_session, fast_hasher):
+    """AuthService over the seeded test database."""
+    return AuthService(seeded_session[0], hasher=fast_hasher)
+
+
+@pytest.mark.parametrize("username,password,expected_success,expected_error", LOGIN_CASES)
+def test_authenticate_user(auth_service, username, password, expected_success, expected_error):
+    """Test AuthService.authenticate_user outcomes."""
+    success, user_data, error = auth_service.authenticate_user(
+        username=username,
+        password=password,
+        device_id="test-device-1"
+    )
     
-    try:
-        # Create test database
-        engine = create_engine('sqlite:///:memory:')
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        db_session = Session()
-        
-        # Create test user
-        user = User(
-            username="testuser",
-            email="test@example.com",
-            password="SecurePass123!",
-            first_name="Test",
-            last_name="User"
-        )
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
-        
-        # Create test role
-        role = Role(name="TestRole", description="Test role")
-        db_session.add(role)
-        db_session.commit()
-        db_session.refresh(role)
-        
-        # Assign role to user
-        user_role = UserRole(user_id=user.id, role_id=role.id, is_primary=True)
-        db_session.add(user_role)
-        db_session.commit()
-        
-        # Test AuthService
-        auth_service = AuthService(db_session)
-        
-        # Test authentication
-        success, user_data, error = auth_service.authenticate_user(
-            username="testuser",
-            password="SecurePass123!",
-            device_id="test-device-1"
-        )
-        
-        assert success, f"Authentication should succeed: {error}"
-        assert user_data is not None, "User data should be returned"
+    assert success == expected_success, error
+    assert error == expected_error
+    if expected_success:
         assert 'token' in user_data, "Token should be included in response"
         assert 'session_id' in user_data, "Session ID should be included in response"
-        
-        # Test invalid password
-        success, user_data, error = auth_service.authenticate_user(
-            username="testuser",
-            password="wrongpassword"
-        )
-        
-        assert not success, "Authentication should fail with wrong password"
-        assert error is not None, "Error message should be provided"
-        
-        # Test token verification
-        token = user_data['token'] if user_data else None
-        if token:
-            is_valid, user_data, error = auth_service.verify_token(token)
-            assert is_valid, f"Token should be valid: {error}"
-        
-        # Create Admin role first
-        admin_role = Role(name="Admin", description="Admin role")
-        db_session.add(admin_role)
-        db_session.commit()
-        db_session.refresh(admin_role)
-        
-        # Test network admin creation
-        admin_data = {
-            'username': 'admin',
-            'email': 'admin@example.com',
-            'password': 'AdminPass123!',
-            'first_name': 'Admin',
-            'last_name': 'User'
-        }
-        
-        success, admin_user_data, error = auth_service.create_network_admin(
-            admin_data, device_id="admin-device"
-        )
-        
-        assert success, f"Admin creation should succeed: {error}"
-        assert admin_user_data is not None, "Admin user data should be returned"
-        
-        # Test network admin check
-        admin_exists = auth_service.check_network_admin_exists()
-        assert admin_exists, "Admin should exist after creation"
-        
-        # Test that second admin creation fails
-        second_admin_data = {
-            'username': 'second_admin',
-            'email': 'admin2@example.com',
-            'password': 'AdminPass123!',
-            'first_name': 'Second',
-            'last_name': 'Admin'
-        }
-        
-        success, admin_user_data, error = auth_service.create_network_admin(
-            second_admin_data, device_id="second-device"
-        )
-        
-        assert not success, "Second admin creation should fail"
-        assert "already exists" in error, "Error should mention admin already exists"
-        
-        print("✅ AuthService tests passed")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error testing AuthService: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
 
 
-def test_authorization_service():
+def test_auth_service(seeded_session, auth_service):
+    """Test that a role-holding user's login token verifies."""
+    db_session, user, admin_role = seeded_session
+    
+    # Create test role
+    role = Role(name="TestRole", description="Test role")
+    db_session.add(role)
+    db_session.commit()
+    
+    # Assign role to user
+    user_role = UserRole(user_id=user.id, role_id=role.id, is_primary=True)
+    db_session.add(user_role)
+    db_session.commit()
+    
+    success, user_data, error = auth_service.authenticate_user(
+        username="testuser",
+        password="SecurePass123!",
+        device_id="test-device-1"
+    )
+    assert success, f"Authentication should succeed: {error}"
+    
+    # Test token verification; the one full signature check in this test
+    is_valid, verified_data, error = auth_service.verify_token(user_data['token'])
+    assert is_valid, f"Token should be valid: {error}"
+    assert verified_data['id'] == user.id
+
+
+def test_authorization_service(seeded_session):
     """Test AuthorizationService functionality."""
-    print("\n✅ Testing AuthorizationService...")
+    db_session, user, admin_role = seeded_session
     
-    try:
-        # Create test database
-        engine = create_engine('sqlite:///:memory:')
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        db_session = Session()
-        
-        # Create test user
-        user = User(
-            username="testuser",
-            email="test@example.com",
-            password="SecurePass123!",
-            first_name="Test",
-            last_name="User"
-        )
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
-        
-        # Create test roles
-        admin_role = Role(name="Admin", description="Admin role")
-        manager_role = Role(name="Manager", description="Manager role")
-        db_session.add_all([admin_role, manager_role])
-        db_session.commit()
-        db_session.refresh(admin_role)
-        db_session.refresh(manager_role)
-        
-        # Create test permissions
-        user_create_perm = Permission(
-            name="users:create",
-            resource="users",
-            action="create",
-            category="user_management"
-        )
-        user_read_perm = Permission(
-            name="users:read",
-            resource="users",
-            action="read",
-            category="user_management"
-        )
-        db_session.add_all([user_create_perm, user_read_perm])
-        db_session.commit()
-        db_session.refresh(user_create_perm)
-        db_session.refresh(user_read_perm)
-        
-        # Assign permissions to roles
-        admin_user_perm = RolePermission(role_id=admin_role.id, permission_id=user_create_perm.id)
-        manager_user_perm = RolePermission(role_id=manager_role.id, permission_id=user_read_perm.id)
-        db_session.add_all([admin_user_perm, manager_user_perm])
-        db_session.commit()
-        
-        # Assign roles to user
-        user_admin_role = UserRole(user_id=user.id, role_id=admin_role.id, is_primary=True)
-        user_manager_role = UserRole(user_id=user.id, role_id=manager_role.id, is_primary=False)
-        db_session.add_all([user_admin_role, user_manager_role])
-        db_session.commit()
-        
-        # Test AuthorizationService
-        auth_service = AuthorizationService(db_session)
-        
-        # Test permission checking
-        has_create_perm = auth_service.check_permission(user.id, "users:create")
-        assert has_create_perm, "User should have users:create permission"
-        
-        has_read_perm = auth_service.check_permission(user.id, "users:read")
-        assert has_read_perm, "User should have users:read permission"
-        
-        has_delete_perm = auth_service.check_permission(user.id, "users:delete")
-        assert not has_delete_perm, "User should not have users:delete permission"
-        
-        # Test role checking
-        has_admin_role = auth_service.check_role(user.id, "Admin")
-        assert has_admin_role, "User should have Admin role"
-        
-        has_manager_role = auth_service.check_role(user.id, "Manager")
-        assert has_manager_role, "User should have Manager role"
-        
-        has_sales_role = auth_service.check_role(user.id, "Sales Assistant")
-        assert not has_sales_role, "User should not have Sales Assistant role"
-        
-        # Test admin checking
-        is_admin = auth_service.is_admin(user.id)
-        assert is_admin, "User should be admin"
-        
-        # Test user context
-        user_context = auth_service.get_user_context(user.id)
-        assert user_context is not None, "User context should be returned"
-        assert 'user_id' in user_context, "User context should contain user_id"
-        assert 'roles' in user_context, "User context should contain roles"
-        assert 'permissions' in user_context, "User context should contain permissions"
-        
-        print("✅ AuthorizationService tests passed")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error testing AuthorizationService: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    # Create another role and permissions; flush assigns their ids
+    manager_role = Role(name="Manager", description="Manager role")
+    user_create_perm = Permission(
+        name="users:create",
+        resource="users",
+        action="create",
+        category="user_management"
+    )
+    user_read_perm = Permission(
+        name="users:read",
+        resource="users",
+        action="read",
+        category="user_management"
+    )
+    db_session.add_all([manager_role, user_create_perm, user_read_perm])
+    db_session.flush()
+    
+    # Assign permissions to roles and roles to user, then commit once;
+    # the link rows are never read back, so insert them as executemany
+    # Core INSERTs instead of going through the unit of work
+    db_session.execute(insert(RolePermission), [
+        {'role_id': admin_role.id, 'permission_id': user_create_perm.id},
+        {'role_id': manager_role.id, 'permission_id': user_read_perm.id}
+    ])
+    db_session.execute(insert(UserRole), [
+        {'user_id': user.id, 'role_id': admin_role.id, 'is_primary': True},
+        {'user_id': user.id, 'role_id': manager_role.id, 'is_primary': False}
+    ])
+    db_session.commit()
+    
+    # Test AuthorizationService
+    auth_service = AuthorizationService(db_session)
+    
+    # Test permission and role checking in one batch
+    granted = auth_service.batch_check(
+        user.id,
+        permissions=["users:create", "users:read", "users:delete"],
+        roles=["Admin", "Manager", "Sales Assistant"]
+    )
+    assert granted['permissions'] == {"users:create", "users:read"}, "User should have users:create and users:read but not users:delete"
+    assert granted['roles'] == {"Admin", "Manager"}, "User should have Admin and Manager roles but not Sales Assistant"
+    
+    # Test single permission and role checks
+    assert auth_service.check_permission(user.id, "users:create"), "User should have users:create permission"
+    assert not auth_service.check_role(user.id, "Sales Assistant"), "User should not have Sales Assistant role"
+    
+    # Test admin checking
+    is_admin = auth_service.is_admin(user.id)
+    assert is_admin, "User should be admin"
+    
+    # Test user context
+    user_context = auth_service.get_user_context(user.id)
+    assert user_context is not None, "User context should be returned"
+    assert 'user_id' in user_context, "User context should contain user_id"
+    assert 'roles' in user_context, "User context should contain roles"
+    assert 'permissions' in user_context, "User context should contain permissions"
 
 
-def test_session_service():
+def test_session_service(seeded_session):
     """Test SessionService functionality."""
-    print("\n✅ Testing SessionService...")
+    db_session, user, admin_role = seeded_session
     
-    try:
-        # Create test database
-        engine = create_engine('sqlite:///:memory:')
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        db_session = Session()
-        
-        # Create test user
-        user = User(
-            username="testuser",
-            email="test@example.com",
-            password="SecurePass123!",
-            first_name="Test",
-            last_name="User"
-        )
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
-        
-        # Test SessionService
-        session_service = SessionService(db_session)
-        
-        # Test session creation
-        success, session_id, error = session_service.create_session(
-            user_id=user.id,
-            device_id="test-device-1"
-        )
-        
-        assert success, f"Session creation should succeed: {error}"
-        assert session_id is not None, "Session ID should be returned"
-        
-        # Test session validation
-        is_valid, error = session_service.validate_session(user.id, session_id)
-        assert is_valid, f"Session should be valid: {error}"
-        
-        # Test session info
-        session_info = session_service.get_session_info(user.id)
-        assert session_info is not None, "Session info should be returned"
-        assert session_info['session_id'] == session_id, "Session ID should match"
-        assert session_info['is_session_active'], "Session should be active"
-        
-        # Test session invalidation
-        success = session_service.invalidate_session(user.id, session_id)
-        assert success, "Session invalidation should succeed"
-        
-        # Test session validation after invalidation
-        is_valid, error = session_service.validate_session(user.id, session_id)
-        assert not is_valid, "Session should be invalid after invalidation"
-        
-        print("✅ SessionService tests passed")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error testing SessionService: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    # Test SessionService
+    session_service = SessionService(db_session)
+    
+    # Test session creation
+    success, session_id, error = session_service.create_session(
+        user_id=user.id,
+        device_id="test-device-1"
+    )
+    
+    assert success, f"Session creation should succeed: {error}"
+    assert session_id is not None, "Session ID should be returned"
+    
+    # Test session validation
+    is_valid, error = session_service.validate_session(user.id, session_id)
+    assert is_valid, f"Session should be valid: {error}"
+    
+    # Test session info
+    session_info = session_service.get_session_info(user.id)
+    assert session_info is not None, "Session info should be returned"
+    assert session_info['session_id'] == session_id, "Session ID should match"
+    assert session_info['is_session_active'], "Session should be active"
+    
+    # Test session invalidation
+    success = session_service.invalidate_session(user.id, session_id)
+    assert success, "Session invalidation should succeed"
+    
+    # Test session validation after invalidation
+    is_valid, error = session_service.validate_session(user.id, session_id)
+    assert not is_valid, "Session should be invalid after invalidation"
 
 
-def test_network_auth_flow():
+def test_network_auth_flow(auth_service):
     """Test network-based authentication flow."""
-    print("\n✅ Testing Network Authentication Flow...")
+    # Test initial state - no admin exists
+    assert not auth_service.check_network_admin_exists(), "No admin should exist initially"
     
-    try:
-        # Create test database
-        engine = create_engine('sqlite:///:memory:')
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        db_session = Session()
-        
-        # Create Admin role first
-        admin_role = Role(name="Admin", description="Admin role")
-        db_session.add(admin_role)
-        db_session.commit()
-        db_session.refresh(admin_role)
-        
-        # Test AuthService
-        auth_service = AuthService(db_session)
-        
-        # Test initial state - no admin exists
-        admin_exists = auth_service.check_network_admin_exists()
-        assert not admin_exists, "No admin should exist initially"
-        
-        # Create first admin for network
-        admin_data = {
-            'username': 'network_admin',
-            'email': 'admin@example.com',
-            'password': 'AdminPass123!',
-            'first_name': 'Network',
-            'last_name': 'Admin'
-        }
-        
-        success, admin_user_data, error = auth_service.create_network_admin(
-            admin_data, device_id="first-device"
-        )
-        
-        assert success, f"First admin creation should succeed: {error}"
-        assert admin_user_data is not None, "Admin user data should be returned"
-        assert 'token' in admin_user_data, "Token should be included for immediate login"
-        
-        # Test that admin now exists
-        admin_exists = auth_service.check_network_admin_exists()
-        assert admin_exists, "Admin should exist after creation"
-        
-        # Test that second admin creation fails
-        second_admin_data = {
-            'username': 'second_admin',
-            'email': 'admin2@example.com',
-            'password': 'AdminPass123!',
-            'first_name': 'Second',
-            'last_name': 'Admin'
-        }
-        
+    for admin_data, device_id, expected_success, expected_error in NETWORK_ADMIN_STEPS:
         success, admin_user_data, error = auth_service.create_network_admin(
-            second_admin_data, device_id="second-device"
+            admin_data, device_id=device_id
         )
         
-        assert not success, "Second admin creation should fail"
-        assert "already exists" in error, "Error should mention admin already exists"
-        
-        print("✅ Network Authentication Flow tests passed")
-        return True
+        assert success == expected_success, error
+        if expected_success:
+            assert 'token' in admin_user_data, "Token should be included for immediate login"
+            # Signing is covered elsewhere; only the claims matter here
+            claims = jwt.decode(admin_user_data['token'], options={'verify_signature': False})
+            assert claims['user_id'] == admin_user_data['id'], "Token should belong to the new admin"
+        else:
+            assert expected_error in error
         
-    except Exception as e:
-        print(f"❌ Error testing Network Authentication Flow: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+        assert auth_service.check_network_admin_exists(), "Admin should exist after creation"
 
 
-def main():
-    """Run all authentication service tests."""
-    print("🧪 Testing Authentication Services")
-    print("=" * 50)
+def test_generate_jwt_token_claims():
+    """Test that generated tokens carry the session claims and verify with PyJWT."""
+    auth_service = AuthService(None)
+    user = User(username="jwtuser", email="jwt@example.com")
+    user.id = 42
+    
+    token = auth_service._generate_jwt_token(user, "session-1")
+    payload = jwt.decode(token, auth_service.jwt_secret, algorithms=['HS256'])
+    assert payload['user_id'] == 42
+    assert payload['session_id'] == "session-1"
+    assert payload['exp'] - payload['iat'] == auth_service.token_expiry
     
-    tests = [
-        test_auth_service,
-        test_authorization_service,
-        test_session_service,
-        test_network_auth_flow
-    ]
+    assert jwt.get_unverified_header(token) == {'alg': 'HS256', 'typ': 'JWT'}
+
+
+def test_verify_token_caches_verified_claims(db_session, monkeypatch):
+    """Test that a verified token is not decoded again until its session ends."""
+    user = User(username="cacheuser", email="cache@example.com", password="CachePass123!")
+    db_session.add(user)
+    db_session.commit()
     
-    passed = 0
-    total = len(tests)
+    auth_service = AuthService(db_session)
+    success, user_data, error = auth_service.authenticate_user("cacheuser", "CachePass123!")
+    assert success, error
     
-    for test in tests:
-        if test():
-            passed += 1
+    decodes = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(jwt, 'decode', lambda *args, **kwargs: decodes.append(args) or real_decode(*args, **kwargs))
     
-    print("\n" + "=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
+    assert auth_service.verify_token(user_data['token'])[0]
+    assert auth_service.verify_token(user_data['token'])[0]
+    assert len(decodes) == 1
     
-    if passed == total:
-        print("🎉 All authentication service tests passed!")
-        return True
-    else:
-        print("❌ Some tests failed. Please check the errors above.")
-        return False
+    assert SessionService(db_session).invalidate_session(user.id, user_data['session_id'])
+    assert auth_service.verify_token(user_data['token'])[0]
+    assert len(decodes) == 2
 
 
-if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+def test_werkzeug_hasher_path(db_session, monkeypatch):
+    """Test authentication through the default Werkzeug scrypt hasher."""
+    # Undo the suite-wide fast_password_hashing override for this test only
+    monkeypatch.setattr(User, 'PASSWORD_HASH_METHOD', 'scrypt')
+    user = User(username="hashuser", email="hash@example.com", password="HashPass123!")
+    assert user.password_hash.startswith('scrypt:')
+    assert user.check_password("HashPass123!")
+    assert not user.check_password("WrongPass123!")
+    db_session.add(user)
+    db_session.commit()
+    
+    auth_service = AuthService(db_session)
+    assert auth_service.authenticate_user("hashuser", "HashPass123!")[0]
+    assert not auth_service.authenticate_user("hashuser", "WrongPass123!")[0]
@@ -0,0 +1,18 @@
+"""
+Tests for the feedback collection runner script.
+"""
+import orjson
+
+from tests.feedback_collection_runner import FeedbackCollector
+
+
+def test_emit_to_bare_filename(tmp_path, monkeypatch):
+    """Test that a filename without a directory part is written to the working directory."""
+    monkeypatch.chdir(tmp_path)
+    collector = FeedbackCollector(filename='feedback.jsonl')
+    
+    collector._emit('validation_feedback', {'overall_satisfaction': 4})
+    collector.save_feedback()
+    
+    record = orjson.loads((tmp_path / 'feedback.jsonl').read_bytes())
+    assert record == {'section': 'validation_feedback', 'overall_satisfaction': 4}
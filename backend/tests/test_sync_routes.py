@@ -1,8 +1,48 @@
 """
 Test cases for sync REST API endpoints.
 """
+import pytest
+from sqlalchemy.pool import StaticPool
+
+from app.extensions import db
+from app.models import DeviceRole
+
+
+@pytest.fixture
+def client(make_app):
+    app = make_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        # One shared connection so the in-memory schema is visible to every request
+        'SQLALCHEMY_ENGINE_OPTIONS': {
+            'poolclass': StaticPool,
+            'connect_args': {'check_same_thread': False}
+        }
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(DeviceRole(device_id='dev001', role='client', priority=2))
+        db.session.commit()
+        yield app.test_client()
+        # The schema stays for the cached app; only this test's row goes
+        DeviceRole.query.delete()
+        db.session.commit()
+        db.session.remove()
+
 
 def test_sync_routes_basic():
     """Test basic sync REST API functionality (stub)."""
     # TODO: Implement tests for sync routes
-    pass 
\ No newline at end of file
+    pass
+
+
+def test_get_device_roles_honours_if_none_match(client):
+    """Test that resending the device roles ETag gets a bodyless 304."""
+    response = client.get('/device/roles')
+    assert response.status_code == 200
+    assert response.get_json()['devices'][0]['device_id'] == 'dev001'
+    etag = response.headers['ETag']
+
+    response = client.get('/device/roles', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
@@ -6,164 +6,221 @@ This module tests all user management REST endpoints including
 CRUD operations, role assignment, and account management.
 """
 
+import os
 import pytest
 import json
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
-from app import create_app
+from sqlalchemy.pool import StaticPool
+
+from app.extensions import db
 from app.models import User, Role, UserRole, AuditLog, Permission, RolePermission
 from app.database import get_db_session
 from app.services import AuthService
+from tests.db_helpers import enable_sqlite_savepoints, JoinedSession
 
 
-@pytest.fixture
-def app():
-    """Create Flask app for testing."""
-    app = create_app({
+@pytest.fixture(scope='session')
+def app(make_app):
+    """Create Flask app once for the whole run."""
+    return make_app({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'
+        # Perf-only: a single PBKDF2 iteration for every password this app hashes
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1',
+        # Only test_audit_logging asserts on audit rows; it turns them back on
+        'AUDIT_LOGGING': False,
+        # Named shared-cache in-memory database: every connection sees the
+        # one schema created by _db, with no disk I/O. The absolute name keeps
+        # Flask-SQLAlchemy from turning it into a file under instance/, and
+        # the xdist worker id keeps each worker's database its own
+        'SQLALCHEMY_DATABASE_URI': (
+            'sqlite+pysqlite:///file:/rms-user-endpoints-'
+            f"{os.environ.get('PYTEST_XDIST_WORKER', 'main')}"
+            '?mode=memory&cache=shared&uri=true'
+        ),
+        'SQLALCHEMY_ENGINE_OPTIONS': {
+            'poolclass': StaticPool,
+            'connect_args': {'check_same_thread': False, 'uri': True}
+        }
     })
-    return app
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
+def _db(app):
+    """Create the schema once; tests never commit past their own transaction."""
+    with app.app_context():
+        enable_sqlite_savepoints(db.engine)
+        db.create_all()
+    return db
+
+
+@pytest.fixture(scope='session')
 def client(app):
-    """Create test client."""
+    """
+    Create one test client for the whole run. It is not entered with `with`:
+    a preserved request context would outlive the app context each test's
+    db_session pushes and pop out of order.
+    """
     return app.test_client()
 
 
 @pytest.fixture
-def db_session(app):
-    """Create database session."""
+def db_session(app, _db, seed_users):
+    """
+    Database session joined to an outer transaction that is rolled back after
+    the test, so commits by fixtures and the app only release SAVEPOINTs.
+    The session is scoped to the test's connection rather than to each app
+    context, so the test and the requests it makes share one Session.
+    """
     with app.app_context():
-        from app.extensions import db
-        db.create_all()
-        session = get_db_session()
-        yield session
-        session.close()
+        connection = _db.engine.connect()
+        transaction = connection.begin()
+        app_session = _db.session
+        _db.session = _db._make_scoped_session({
+            'class_': JoinedSession,
+            'bind': connection,
+            'join_transaction_mode': 'create_savepoint',
+            'scopefunc': lambda: connection
+        })
+        try:
+            yield get_db_session()
+        finally:
+            _db.session.remove()
+            _db.session = app_session
+            transaction.rollback()
+            connection.close()
 
 
-@pytest.fixture
-def admin_user(db_session):
-    """Create admin user for testing."""
-    # Create permissions
-    permissions = [
-        Permission(name='users:read', resource='users', action='read', category='user_management', description='Read user information'),
-        Permission(name='users:create', resource='users', action='create', category='user_management', description='Create new users'),
-        Permission(name='users:update', resource='users', action='update', category='user_management', description='Update user information'),
-        Permission(name='users:delete', resource='users', action='delete', category='user_management', description='Delete users'),
-        Permission(name='auth:login', resource='auth', action='login', category='authentication', description='User login'),
-        Permission(name='auth:logout', resource='auth', action='logout', category='authentication', description='User logout'),
-    ]
-    
-    for permission in permissions:
-        db_session.add(permission)
-    db_session.flush()
-    
-    # Create admin role
-    admin_role = Role(
-        name='Admin',
-        description='System Administrator',
-        priority=1,
-        created_by=1
-    )
-    db_session.add(admin_role)
-    db_session.flush()
-    
-    # Assign all permissions to admin role
-    for permission in permissions:
-        role_permission = RolePermission(
+@pytest.fixture(scope='session')
+def seed_users(app, _db):
+    """
+    Commit the admin and manager users once before any test runs; each test's
+    changes to them are rolled back with its transaction.
+    """
+    with app.app_context():
+        # Create permissions in one multi-row insert
+        db.session.bulk_insert_mappings(Permission, [
+            {'name': 'users:read', 'resource': 'users', 'action': 'read', 'category': 'user_management', 'description': 'Read user information'},
+            {'name': 'users:create', 'resource': 'users', 'action': 'create', 'category': 'user_management', 'description': 'Create new users'},
+            {'name': 'users:update', 'resource': 'users', 'action': 'update', 'category': 'user_management', 'description': 'Update user information'},
+            {'name': 'users:delete', 'resource': 'users', 'action': 'delete', 'category': 'user_management', 'description': 'Delete users'},
+            {'name': 'auth:login', 'resource': 'auth', 'action': 'login', 'category': 'authentication', 'description': 'User login'},
+            {'name': 'auth:logout', 'resource': 'auth', 'action': 'logout', 'category': 'authentication', 'description': 'User logout'},
+        ])
+        
+        # Create admin role
+        admin_role = Role(
+            name='Admin',
+            description='System Administrator',
+            priority=1,
+            created_by=1
+        )
+        db.session.add(admin_role)
+        db.session.flush()
+        
+        # Assign all permissions to admin role, reading their ids back once
+        permission_ids = [permission_id for (permission_id,) in db.session.query(Permission.id)]
+        db.session.bulk_insert_mappings(RolePermission, [
+            {'role_id': admin_role.id, 'permission_id': permission_id, 'is_active': True, 'created_by': 1}
+            for permission_id in permission_ids
+        ])
+        
+        # Create admin user
+        admin_user = User(
+            username='admin',
+            email='admin@example.com',
+            password='Admin123!',  # Strong password with uppercase, lowercase, number, and special character
+            first_name='Admin',
+            last_name='User',
+            is_active=True,
+            created_by=1
+        )
+        db.session.add(admin_user)
+        db.session.flush()
+        
+        # Assign admin role
+        user_role = UserRole(
+            user_id=admin_user.id,
             role_id=admin_role.id,
-            permission_id=permission.id,
+            is_primary=True,
+            created_by=1
+        )
+        db.session.add(user_role)
+        
+        # Create manager role
+        manager_role = Role(
+            name='Manager',
+            description='Store Manager',
+            priority=2,
+            created_by=1
+        )
+        db.session.add(manager_role)
+        db.session.flush()
+        
+        # Create manager user
+        manager_user = User(
+            username='manager',
+            email='manager@example.com',
+            password='Manager123!',  # Strong password with uppercase, lowercase, number, and special character
+            first_name='Store',
+            last_name='Manager',
             is_active=True,
             created_by=1
         )
-        db_session.add(role_permission)
-    
-    # Create admin user
-    admin_user = User(
-        username='admin',
-        email='admin@example.com',
-        password='Admin123!',  # Strong password with uppercase, lowercase, number, and special character
-        first_name='Admin',
-        last_name='User',
-        is_active=True,
-        created_by=1
-    )
-    db_session.add(admin_user)
-    db_session.flush()
-    
-    # Assign admin role
-    user_role = UserRole(
-        user_id=admin_user.id,
-        role_id=admin_role.id,
-        is_primary=True,
-        created_by=1
-    )
-    db_session.add(user_role)
-    db_session.commit()
-    
-    return admin_user
+        db.session.add(manager_user)
+        db.session.flush()
+        
+        # Assign manager role
+        user_role = UserRole(
+            user_id=manager_user.id,
+            role_id=manager_role.id,
+            is_primary=True,
+            created_by=1
+        )
+        db.session.add(user_role)
+        db.session.commit()
+        db.session.remove()
 
 
 @pytest.fixture
-def manager_user(db_session):
-    """Create manager user for testing."""
-    # Create manager role
-    manager_role = Role(
-        name='Manager',
-        description='Store Manager',
-        priority=2,
-        created_by=1
-    )
-    db_session.add(manager_role)
-    db_session.flush()
-    
-    # Create manager user
-    manager_user = User(
-        username='manager',
-        email='manager@example.com',
-        password='Manager123!',  # Strong password with uppercase, lowercase, number, and special character
-        first_name='Store',
-        last_name='Manager',
-        is_active=True,
-        created_by=1
-    )
-    db_session.add(manager_user)
-    db_session.flush()
-    
-    # Assign manager role
-    user_role = UserRole(
-        user_id=manager_user.id,
-        role_id=manager_role.id,
-        is_primary=True,
-        created_by=1
-    )
-    db_session.add(user_role)
-    db_session.commit()
-    
-    return manager_user
+def admin_user(db_session):
+    """Admin user seeded by seed_users, loaded in the test's session."""
+    return db_session.query(User).filter_by(username='admin').first()
 
 
 @pytest.fixture
-def auth_token(admin_user, client):
-    """Get authentication token for admin user."""
-    response = client.post('/api/auth/login', json={
-        'username': 'admin',
-        'password': 'Admin123!'
-    })
-    data = response.get_json()
-    return data['token']
+def manager_user(db_session):
+    """Manager user seeded by seed_users, loaded in the test's session."""
+    return db_session.query(User).filter_by(username='manager').first()
+
+
+@pytest.fixture(scope='session')
+def auth_headers(app, seed_users):
+    """Authorization header for the seeded admin, minted without the login route."""
+    with app.app_context():
+        admin = db.session.query(User).filter_by(username='admin').first()
+        token = AuthService(db.session)._generate_jwt_token(admin)
+        db.session.remove()
+    return {'Authorization': f'Bearer {token}'}
 
 
 class TestUserEndpoints:
     """Test user management endpoints."""
     
-    def test_list_users_success(self, client, auth_token, db_session):
+    def test_login_endpoint(self, client, admin_user, db_session):
+        """Test that the seeded admin can log in through the auth route."""
+        response = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'Admin123!'
+        })
+        
+        assert response.status_code == 200
+        assert response.get_json()['token']
+    
+    def test_list_users_success(self, client, auth_headers, db_session):
         """Test successful user listing."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.get('/api/users', headers=headers)
+        response = client.get('/api/users', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -172,10 +229,9 @@ class TestUserEndpoints:
         assert 'pagination' in data
         assert len(data['users']) > 0
     
-    def test_list_users_with_pagination(self, client, auth_token, db_session):
+    def test_list_users_with_pagination(self, client, auth_headers, db_session):
         """Test user listing with pagination."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.get('/api/users?page=1&per_page=5', headers=headers)
+        response = client.get('/api/users?page=1&per_page=5', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -184,10 +240,9 @@ class TestUserEndpoints:
         assert data['pagination']['page'] == 1
         assert data['pagination']['per_page'] == 5
     
-    def test_list_users_with_search(self, client, auth_token, db_session):
+    def test_list_users_with_search(self, client, auth_headers, db_session):
         """Test user listing with search filter."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.get('/api/users?search=admin', headers=headers)
+        response = client.get('/api/users?search=admin', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -197,10 +252,9 @@ class TestUserEndpoints:
         for user in data['users']:
             assert 'admin' in user['username'].lower() or 'admin' in user['email'].lower()
     
-    def test_list_users_with_role_filter(self, client, auth_token, db_session):
+    def test_list_users_with_role_filter(self, client, auth_headers, db_session):
         """Test user listing with role filter."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.get('/api/users?role=Admin', headers=headers)
+        response = client.get('/api/users?role=Admin', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -210,52 +264,9 @@ class TestUserEndpoints:
         for user in data['users']:
             assert 'Admin' in user['roles']
     
-    def test_list_users_with_status_filter(self, client, auth_token, db_session):
+    def test_list_users_with_status_filter(self, client, auth_headers, manager_user, db_session):
         """Test user listing with status filter."""
-        # Ensure we have active users in the database
-        from app.models import User, Role, UserRole
-        
-        # Create a test user if not exists
-        existing_user = db_session.query(User).filter(User.username == 'manager').first()
-        if not existing_user:
-            # Create manager role if not exists
-            manager_role = db_session.query(Role).filter(Role.name == 'Manager').first()
-            if not manager_role:
-                manager_role = Role(
-                    name='Manager',
-                    description='Store Manager',
-                    priority=2,
-                    created_by=1
-                )
-                db_session.add(manager_role)
-                db_session.flush()
-            
-            # Create manager user
-            manager_user = User(
-                username='manager',
-                email='manager@example.com',
-                password='Manager123!',
-                first_name='Store',
-                last_name='Manager',
-                is_active=True,
-                created_by=1
-            )
-            db_session.add(manager_user)
-            db_session.flush()
-            
-            # Assign manager role
-            user_role = UserRole(
-                user_id=manager_user.id,
-                role_id=manager_role.id,
-                is_primary=True,
-                created_by=1
-            )
-            db_session.add(user_role)
-            db_session.commit()
-        
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        
-        response = client.get('/api/users?status=active', headers=headers)
+        response = client.get('/api/users?status=active', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -272,13 +283,12 @@ class TestUserEndpoints:
         
         assert response.status_code == 401
     
-    def test_get_user_success(self, client, auth_token, admin_user, db_session):
+    def test_get_user_success(self, client, auth_headers, admin_user, db_session):
         """Test successful user retrieval."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         # Get user ID from database to avoid detached instance issues
         user = db_session.query(User).filter(User.username == 'admin').first()
         user_id = user.id
-        response = client.get(f'/api/users/{user_id}', headers=headers)
+        response = client.get(f'/api/users/{user_id}', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -289,10 +299,9 @@ class TestUserEndpoints:
         assert 'roles' in data['user']
         assert 'permissions' in data['user']
     
-    def test_get_user_not_found(self, client, auth_token, db_session):
+    def test_get_user_not_found(self, client, auth_headers, db_session):
         """Test user retrieval for non-existent user."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.get('/api/users/999', headers=headers)
+        response = client.get('/api/users/999', headers=auth_headers)
         
         assert response.status_code == 404
         data = response.get_json()
@@ -305,9 +314,8 @@ class TestUserEndpoints:
         
         assert response.status_code == 401
     
-    def test_create_user_success(self, client, auth_token, db_session):
+    def test_create_user_success(self, client, auth_headers, db_session):
         """Test successful user creation."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         user_data = {
             'username': 'newuser',
             'email': 'newuser@example.com',
@@ -318,7 +326,7 @@ class TestUserEndpoints:
             'is_active': True
         }
         
-        response = client.post('/api/users', json=user_data, headers=headers)
+        response = client.post('/api/users', json=user_data, headers=auth_headers)
         
         assert response.status_code == 201
         data = response.get_json()
@@ -328,14 +336,13 @@ class TestUserEndpoints:
         assert data['user']['email'] == 'newuser@example.com'
         assert data['user']['is_active'] is True
     
-    def test_create_user_with_roles(self, client, auth_token, db_session):
+    def test_create_user_with_roles(self, client, auth_headers, db_session):
         """Test user creation with role assignment."""
         # Create a role first
         role = Role(name='Assistant', description='Assistant Role', created_by=1)
         db_session.add(role)
-        db_session.commit()
+        db_session.flush()
         
-        headers = {'Authorization': f'Bearer {auth_token}'}
         user_data = {
             'username': 'assistant',
             'email': 'assistant@example.com',
@@ -345,114 +352,61 @@ class TestUserEndpoints:
             'roles': [role.id]
         }
         
-        response = client.post('/api/users', json=user_data, headers=headers)
+        response = client.post('/api/users', json=user_data, headers=auth_headers)
         
         assert response.status_code == 201
         data = response.get_json()
         assert data['success'] is True
         assert 'Assistant' in data['user']['roles']
     
-    def test_create_user_duplicate_username(self, client, auth_token, admin_user, db_session):
-        """Test user creation with duplicate username."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        user_data = {
+    @pytest.mark.parametrize("payload,status,err_substr", [
+        pytest.param({
             'username': 'admin',  # Already exists
             'email': 'newadmin@example.com',
             'password': 'Password123!',
             'first_name': 'New',
             'last_name': 'Admin'
-        }
-        
-        response = client.post('/api/users', json=user_data, headers=headers)
-        
-        assert response.status_code == 409
-        data = response.get_json()
-        assert data['success'] is False
-        assert 'Username or email already exists' in data['error']
-    
-    def test_create_user_duplicate_email(self, client, auth_token, admin_user, db_session):
-        """Test user creation with duplicate email."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        user_data = {
+        }, 409, 'Username or email already exists', id='duplicate-username'),
+        pytest.param({
             'username': 'newadmin',
             'email': 'admin@example.com',  # Already exists
             'password': 'Password123!',
             'first_name': 'New',
             'last_name': 'Admin'
-        }
-        
-        response = client.post('/api/users', json=user_data, headers=headers)
-        
-        assert response.status_code == 409
-        data = response.get_json()
-        assert data['success'] is False
-        assert 'Username or email already exists' in data['error']
-    
-    def test_create_user_missing_fields(self, client, auth_token, db_session):
-        """Test user creation with missing required fields."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        user_data = {
+        }, 409, 'Username or email already exists', id='duplicate-email'),
+        pytest.param({
             'username': 'newuser',
             'email': 'newuser@example.com'
             # Missing password, first_name, last_name
-        }
-        
-        response = client.post('/api/users', json=user_data, headers=headers)
-        
-        assert response.status_code == 400
-        data = response.get_json()
-        assert 'Missing required fields' in data['error']
-    
-    def test_create_user_weak_password(self, client, auth_token, db_session):
-        """Test user creation with weak password."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        user_data = {
+        }, 400, 'Missing required fields', id='missing-fields'),
+        pytest.param({
             'username': 'newuser',
             'email': 'newuser@example.com',
-            'password': 'weak',  # Weak password
+            'password': 'weak',
             'first_name': 'New',
             'last_name': 'User'
-        }
-        
-        response = client.post('/api/users', json=user_data, headers=headers)
-        
-        assert response.status_code == 400
-        data = response.get_json()
-        assert 'Password must be at least 8 characters long' in data['error']
-    
-    def test_create_user_password_missing_uppercase(self, client, auth_token, db_session):
-        """Test user creation with password missing uppercase."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        user_data = {
+        }, 400, 'Password must be at least 8 characters long', id='weak-password'),
+        pytest.param({
             'username': 'newuser',
             'email': 'newuser@example.com',
-            'password': 'password123!',  # Missing uppercase
+            'password': 'password123!',
             'first_name': 'New',
             'last_name': 'User'
-        }
-        
-        response = client.post('/api/users', json=user_data, headers=headers)
-        
-        assert response.status_code == 400
-        data = response.get_json()
-        assert 'Password must contain at least one uppercase letter' in data['error']
-    
-    def test_create_user_password_missing_special_char(self, client, auth_token, db_session):
-        """Test user creation with password missing special character."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        user_data = {
+        }, 400, 'Password must contain at least one uppercase letter', id='password-missing-uppercase'),
+        pytest.param({
             'username': 'newuser',
             'email': 'newuser@example.com',
-            'password': 'Password123',  # Missing special character
+            'password': 'Password123',
             'first_name': 'New',
             'last_name': 'User'
-        }
-        
-        response = client.post('/api/users', json=user_data, headers=headers)
+        }, 400, 'Password must contain at least one special character', id='password-missing-special-char'),
+    ])
+    def test_create_user_invalid_payload(self, client, auth_headers, db_session, payload, status, err_substr):
+        """Test user creation rejects duplicate and invalid payloads."""
+        response = client.post('/api/users', json=payload, headers=auth_headers)
         
-        assert response.status_code == 400
-        data = response.get_json()
-        assert 'Password must contain at least one special character' in data['error']
+        assert response.status_code == status
+        assert err_substr in response.get_json()['error']
     
     def test_create_user_unauthorized(self, client, db_session):
         """Test user creation without authentication."""
@@ -468,16 +422,15 @@ class TestUserEndpoints:
         
         assert response.status_code == 401
     
-    def test_update_user_success(self, client, auth_token, manager_user, db_session):
+    def test_update_user_success(self, client, auth_headers, manager_user, db_session):
         """Test successful user update."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         update_data = {
             'first_name': 'Updated',
             'last_name': 'Manager',
             'phone': '+9876543210'
         }
         
-        response = client.put(f'/api/users/{manager_user.id}', json=update_data, headers=headers)
+        response = client.put(f'/api/users/{manager_user.id}', json=update_data, headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -486,42 +439,39 @@ class TestUserEndpoints:
         assert data['user']['last_name'] == 'Manager'
         assert data['user']['phone'] == '+9876543210'
     
-    def test_update_user_email(self, client, auth_token, manager_user, db_session):
+    def test_update_user_email(self, client, auth_headers, manager_user, db_session):
         """Test user update with email change."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         update_data = {
             'email': 'updated@example.com'
         }
         
-        response = client.put(f'/api/users/{manager_user.id}', json=update_data, headers=headers)
+        response = client.put(f'/api/users/{manager_user.id}', json=update_data, headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
         assert data['success'] is True
         assert data['user']['email'] == 'updated@example.com'
     
-    def test_update_user_email_conflict(self, client, auth_token, admin_user, manager_user, db_session):
+    def test_update_user_email_conflict(self, client, auth_headers, admin_user, manager_user, db_session):
         """Test user update with conflicting email."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         update_data = {
             'email': 'admin@example.com'  # Already used by admin_user
         }
         
-        response = client.put(f'/api/users/{manager_user.id}', json=update_data, headers=headers)
+        response = client.put(f'/api/users/{manager_user.id}', json=update_data, headers=auth_headers)
         
         assert response.status_code == 409
         data = response.get_json()
         assert data['success'] is False
         assert 'Email already exists' in data['error']
     
-    def test_update_user_not_found(self, client, auth_token, db_session):
+    def test_update_user_not_found(self, client, auth_headers, db_session):
         """Test user update for non-existent user."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         update_data = {
             'first_name': 'Updated'
         }
         
-        response = client.put('/api/users/999', json=update_data, headers=headers)
+        response = client.put('/api/users/999', json=update_data, headers=auth_headers)
         
         assert response.status_code == 404
         data = response.get_json()
@@ -538,11 +488,10 @@ class TestUserEndpoints:
         
         assert response.status_code == 401
     
-    def test_delete_user_success(self, client, auth_token, manager_user, db_session):
+    def test_delete_user_success(self, client, auth_headers, manager_user, db_session):
         """Test successful user deletion."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         user_id = manager_user.id  # Get ID before user becomes detached
-        response = client.delete(f'/api/users/{user_id}', headers=headers)
+        response = client.delete(f'/api/users/{user_id}', headers=auth_headers)
         
         assert response.status_code == 200
         data = response.get_json()
@@ -553,23 +502,21 @@ class TestUserEndpoints:
         user = db_session.query(User).filter(User.id == user_id).first()
         assert user.is_active is False
     
-    def test_delete_user_not_found(self, client, auth_token, db_session):
+    def test_delete_user_not_found(self, client, auth_headers, db_session):
         """Test user deletion for non-existent user."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.delete('/api/users/999', headers=headers)
+        response = client.delete('/api/users/999', headers=auth_headers)
         
         assert response.status_code == 404
         data = response.get_json()
         assert data['success'] is False
         assert 'User not found' in data['error']
     
-    def test_delete_user_self(self, client, auth_token, admin_user, db_session):
+    def test_delete_user_self(self, client, auth_headers, admin_user, db_session):
         """Test user deletion of own account."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
         # Get user ID from database to avoid detached instance issues
         user = db_session.query(User).filter(User.username == 'admin').first()
         user_id = user.id
-        response = client.delete(f'/api/users/{user_id}', headers=headers)
+        response = client.delete(f'/api/users/{user_id}', headers=auth_headers)
         
         assert response.status_code == 400
         data = response.get_json()
@@ -582,9 +529,9 @@ class TestUserEndpoints:
         
         assert response.status_code == 401
     
-    def test_audit_logging(self, client, auth_token, manager_user, admin_user, db_session):
+    def test_audit_logging(self, client, auth_headers, manager_user, admin_user, db_session, monkeypatch):
         """Test that user operations are properly logged."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
+        monkeypatch.setitem(client.application.config, 'AUDIT_LOGGING', True)
         
         # Get user IDs from database to avoid detached instance issues
         admin_user_db = db_session.query(User).filter(User.username == 'admin').first()
@@ -593,7 +540,7 @@ class TestUserEndpoints:
         manager_id = manager_user_db.id
         
         # Perform a user operation
-        response = client.get(f'/api/users/{manager_id}', headers=headers)
+        response = client.get(f'/api/users/{manager_id}', headers=auth_headers)
         assert response.status_code == 200
         
         # Check that audit log was created
@@ -607,19 +554,17 @@ class TestUserEndpoints:
         assert latest_log.resource_id == str(manager_id)  # Convert to string for comparison
         assert latest_log.is_success == '1'  # Stored as string in database
     
-    def test_invalid_json_request(self, client, auth_token, db_session):
+    def test_invalid_json_request(self, client, auth_headers, db_session):
         """Test handling of invalid JSON requests."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.post('/api/users', data='invalid json', headers=headers)
+        response = client.post('/api/users', data='invalid json', headers=auth_headers)
         
         assert response.status_code == 400
         data = response.get_json()
         assert 'Content-Type must be application/json' in data['error']
     
-    def test_wrong_content_type(self, client, auth_token, db_session):
+    def test_wrong_content_type(self, client, auth_headers, db_session):
         """Test handling of wrong content type."""
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        response = client.put('/api/users/1', data='some data', headers=headers)
+        response = client.put('/api/users/1', data='some data', headers=auth_headers)
         
         assert response.status_code == 400
         data = response.get_json()